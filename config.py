@@ -133,6 +133,10 @@ class UIConfig:
     
     # Thresholds
     allocation_tolerance_pct: float = 2.0  # Percentage points
+    max_chart_items: int = 20  # Cap per-ticker chart traces; tail folds into "Others"
+    table_threshold: int = 20  # Above this row count, card loops fall back to st.dataframe
+    hide_closed_positions: bool = True  # Drop ~zero-value rows from holdings views
+    closed_position_epsilon: float = 1e-6  # |Market_Value| at or below this counts as closed
 
 
 @dataclass
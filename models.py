@@ -386,6 +386,20 @@ class Asset(BaseModel):
             modified_date=str(data.get("modified_date", datetime.now().strftime("%Y-%m-%d")))
         )
     
+    @classmethod
+    def fast_from_dict(cls, data: dict) -> "Asset":
+        """
+        Create Asset from a canonical dict (the shape to_dict produces).
+
+        Uses a constructor specialized at import time for the fixed
+        schema, skipping from_dict's legacy-key migration scanning.
+        Falls back to the general from_dict for anything else.
+        """
+        try:
+            return cls._fast_from_dict(data)
+        except (KeyError, ValueError, TypeError, AttributeError):
+            return cls.from_dict(data)
+
     @staticmethod
     def _migrate_legacy_type(old_type: str) -> tuple[str, str, Optional[str]]:
         """Migrate legacy type to (category, asset_type, sub_type)."""
@@ -399,6 +413,39 @@ class Asset(BaseModel):
         return ("investment", old_type, None)
 
 
+def _build_fast_asset_loader() -> None:
+    """
+    Generate Asset._fast_from_dict for the canonical to_dict schema.
+
+    The field set is fixed at import time, so we introspect model_fields
+    and emit a direct keyword-argument constructor via exec. Pydantic
+    still validates in Asset.__init__; what this removes is the generic
+    per-field fallback chains and legacy-key scanning of from_dict.
+    """
+    # Fields whose canonical serialized form needs a conversion expression.
+    custom = {
+        "sub_type": "d['sub_type'] or None",
+        "suggested_sl": "None if d['suggested_sl'] in ('', None) else float(d['suggested_sl'])",
+        "suggested_tp": "None if d['suggested_tp'] in ('', None) else float(d['suggested_tp'])",
+        "loan_plan_id": "d['loan_plan_id'] or None",
+        "tags": "[t.strip() for t in d['tags'].split(',') if t.strip()] if d['tags'] else []",
+    }
+    # Legacy fields are not part of the canonical schema.
+    skip = {"type", "ticker"}
+
+    args = ", ".join(
+        f"{name}={custom.get(name, f'd[{name!r}]')}"
+        for name in Asset.model_fields
+        if name not in skip
+    )
+    namespace = {"Asset": Asset}
+    exec(f"def _fast_from_dict(d):\n    return Asset({args})", namespace)
+    Asset._fast_from_dict = staticmethod(namespace["_fast_from_dict"])
+
+
+_build_fast_asset_loader()
+
+
 
 class MarketData(BaseModel):
     """
@@ -286,6 +286,29 @@ def _parse_settings(records: List[dict]) -> Dict[str, float]:
              data[cls] = float(pct)
     return data
 
+def _atomic_write(path: str, payload: bytes) -> None:
+    """
+    Write bytes to path via a temp file and atomic rename.
+
+    Args:
+        path: Destination filename
+        payload: File contents
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except Exception:
+        # Don't leave a stray temp file behind on failure
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
+
+
 def save_all_data(
     accounts: List[dict], 
     assets: List[dict], 
@@ -370,10 +393,11 @@ def save_all_data(
     
     # 3. Save (Local or Drive)
     if config.dev_mode:
-        with open(PORTFOLIO_FILENAME, "wb") as f:
-            f.write(output_port.getvalue())
-        with open(LOANS_FILENAME, "wb") as f:
-            f.write(output_loans.getvalue())
+        # Write-then-rename keeps the workbooks crash-safe: a rerun that
+        # dies mid-write leaves the previous file intact, and os.replace
+        # is atomic on the same filesystem.
+        _atomic_write(PORTFOLIO_FILENAME, output_port.getvalue())
+        _atomic_write(LOANS_FILENAME, output_loans.getvalue())
         logger.info(f"DEV_MODE: Saved {PORTFOLIO_FILENAME} and {LOANS_FILENAME}")
     else:
         service = get_service()
@@ -6,6 +6,7 @@ including exchange rates, stock prices, and portfolio updates.
 """
 
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
@@ -18,10 +19,15 @@ from models import PriceUpdate, MarketData
 from config import get_config
 import time
 import functools
+import itertools
 
 logger = get_logger(__name__)
 config = get_config()
 
+# Monotonic frame version: every freshly built market-data frame gets the
+# next value in df.attrs['version'], giving downstream caches an O(1) key.
+_frame_version = itertools.count(1)
+
 import random
 
 def retry_with_backoff(retries=3, backoff_in_seconds=1):
@@ -68,9 +74,11 @@ def get_exchange_rate() -> float:
         return config.market_data.default_exchange_rate
 
 
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=512)
 def search_yahoo_ticker(query: str) -> List[str]:
     """
-    Search for ticker symbols on Yahoo Finance.
+    Search for ticker symbols on Yahoo Finance (cached per query for an
+    hour, so keystroke-driven reruns skip the HTTP round-trip).
     
     Args:
         query: Search query string
@@ -266,6 +274,28 @@ def auto_update_portfolio(portfolio: List[dict]) -> Tuple[int, int, List[dict]]:
     return success_count, fail_count, portfolio
 
 
+def type_value_sums(df: pd.DataFrame, value_col: str = "Market_Value") -> pd.Series:
+    """
+    Sum a value column per asset Type without the pandas groupby machinery.
+
+    The Type column rarely holds more than a handful of categories, so
+    factorize + np.bincount beats constructing a groupby object for the
+    per-type totals the UI modules need.
+
+    Args:
+        df: Market-data DataFrame with a 'Type' column
+        value_col: Column to sum per type
+
+    Returns:
+        pd.Series: Sums indexed by Type, in first-appearance order
+    """
+    if df.empty:
+        return pd.Series(dtype=float)
+    codes, uniques = pd.factorize(df['Type'].to_numpy())
+    sums = np.bincount(codes, weights=df[value_col].to_numpy(), minlength=len(uniques))
+    return pd.Series(sums, index=uniques)
+
+
 def get_market_data(
     portfolio: List[dict],
     target_currency: str,
@@ -458,4 +488,6 @@ def get_market_data(
         })
     
     logger.info(f"Market data fetched for {len(data_list)} assets")
-    return pd.DataFrame(data_list)
+    df = pd.DataFrame(data_list)
+    df.attrs['version'] = next(_frame_version)
+    return df
@@ -5,6 +5,7 @@ This module provides ATR-based stop loss and take profit calculations
 using the Average True Range (ATR) indicator and R-Ratio (risk-reward ratio).
 """
 
+import streamlit as st
 import pandas as pd
 import numpy as np
 from typing import Dict, Optional
@@ -119,6 +120,7 @@ def suggest_sl_tp_for_entry(
     return result
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def suggest_sl_tp_for_holding(
     ticker: str,
     avg_cost: float,
@@ -131,8 +133,11 @@ def suggest_sl_tp_for_holding(
     Calculate SL/TP suggestions for an existing holding.
     
     This function calculates stop loss and take profit levels for positions
-    you already own, based on your average cost and current ATR.
-    
+    you already own, based on your average cost and current ATR. Results are
+    cached for an hour per argument combination since the underlying daily
+    bars change at most once per day; call ``suggest_sl_tp_for_holding.clear()``
+    to force a fresh fetch.
+
     Args:
         ticker: Stock ticker symbol
         avg_cost: Average cost per share
@@ -5,6 +5,10 @@ This module provides centralized, type-safe access to Streamlit session state
 with default value management and validation.
 """
 
+import sys
+
+import numpy as np
+import pandas as pd
 import streamlit as st
 from typing import Optional, List, Any
 from google.oauth2.credentials import Credentials
@@ -20,19 +24,32 @@ class SessionStateManager:
     This class provides a clean interface for accessing and modifying
     session state, ensuring consistency and reducing bugs.
     """
-    
-    # State keys
-    GOOGLE_CREDS = "google_creds"
-    USER_INFO = "user_info"
-    PORTFOLIO = "portfolio"
-    ALLOCATION_TARGETS = "allocation_targets"
-    HAS_AUTO_UPDATED = "has_auto_updated"
-    DRAFT_ACTIONS = "draft_actions"
-    CALC_BASE_SUGGESTIONS = "calc_base_suggestions"
-    CALC_MANUAL_ADJUST = "calc_manual_adjust"
-    LAST_CALC_FUND = "last_calc_fund"
-    LOAD_PORTFOLIO = "load_portfolio"
-    LOAD_ALLOCATION_TARGETS = "load_allocation_targets"
+
+    # No per-instance __dict__: attribute access goes through the packed
+    # slot descriptors, which is both faster and smaller. Add new slots
+    # here if instance attributes are introduced.
+    __slots__ = ("config",)
+
+
+    # Whether this manager owns every key the app stores in session state.
+    # When True, clear_all() can use the single C-level dict clear instead
+    # of deleting keys one by one. Set to False if third-party components
+    # start storing state that must survive a logout.
+    _OWNS_ALL_STATE: bool = True
+
+    # State keys. Interned so session-state dict lookups hit the
+    # identity-based fast path (pointer comparison) on every access.
+    GOOGLE_CREDS = sys.intern("google_creds")
+    USER_INFO = sys.intern("user_info")
+    PORTFOLIO = sys.intern("portfolio")
+    ALLOCATION_TARGETS = sys.intern("allocation_targets")
+    HAS_AUTO_UPDATED = sys.intern("has_auto_updated")
+    DRAFT_ACTIONS = sys.intern("draft_actions")
+    CALC_BASE_SUGGESTIONS = sys.intern("calc_base_suggestions")
+    CALC_MANUAL_ADJUST = sys.intern("calc_manual_adjust")
+    LAST_CALC_FUND = sys.intern("last_calc_fund")
+    LOAD_PORTFOLIO = sys.intern("load_portfolio")
+    LOAD_ALLOCATION_TARGETS = sys.intern("load_allocation_targets")
     
     def __init__(self):
         """Initialize the state manager."""
@@ -96,7 +113,7 @@ class SessionStateManager:
         Returns:
             List[Asset]: List of validated Asset instances
         """
-        return [Asset.from_dict(item) for item in self.portfolio]
+        return list(map(Asset.fast_from_dict, self.portfolio))
     
     def set_portfolio_assets(self, assets: List[Asset]):
         """
@@ -307,6 +324,10 @@ class SessionStateManager:
     
     def clear_all(self):
         """Clear all managed session state (useful for logout)."""
+        if self._OWNS_ALL_STATE:
+            st.session_state.clear()
+            return
+
         keys_to_clear = [
             self.GOOGLE_CREDS,
             self.USER_INFO,
@@ -320,10 +341,9 @@ class SessionStateManager:
             self.LOAD_PORTFOLIO,
             self.LOAD_ALLOCATION_TARGETS,
         ]
-        
+
         for key in keys_to_clear:
-            if key in st.session_state:
-                del st.session_state[key]
+            st.session_state.pop(key, None)
     
     def initialize(self):
         """
@@ -337,6 +357,30 @@ class SessionStateManager:
         _ = self.allocation_targets
 
 
+def get_allocation_targets_np() -> tuple:
+    """
+    Get the allocation targets as a (pd.Index, float64 ndarray) pair.
+
+    The dict in session state is the source of truth; this keeps a
+    parallel array form cached alongside it so renderers can align
+    targets vectorized instead of doing per-category dict lookups. The
+    cache entry holds a reference to the dict it was built from and is
+    rebuilt whenever a new dict is assigned (the settings page always
+    assigns a fresh dict on save).
+
+    Returns:
+        tuple: (Index of category names, array of target percentages)
+    """
+    targets = get_state_manager().allocation_targets
+    cached = st.session_state.get("_targets_np")
+    if cached is not None and cached[0] is targets and len(cached[1]) == len(targets):
+        return cached[1], cached[2]
+    idx = pd.Index(list(targets.keys()))
+    vals = np.fromiter(targets.values(), dtype='float64', count=len(targets))
+    st.session_state["_targets_np"] = (targets, idx, vals)
+    return idx, vals
+
+
 # Global instance
 _state_manager: Optional[SessionStateManager] = None
 
@@ -5,26 +5,379 @@ This module provides the dedicated Asset Management page with full CRUD operatio
 for portfolio assets including buy, sell, edit, delete, and transfer functions.
 """
 
+import functools
+import hashlib
+import json
+import re
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from modules.data_loader import save_all_data
 from modules.market_service import search_yahoo_ticker, fetch_single_price
+from modules.risk_management import suggest_sl_tp_for_holding
 from models import Account
 from config import get_config
 
 config = get_config()
 
+# check_is_outdated runs once per asset row per render; parse the fixed
+# "%Y-%m-%d %H:%M" format by slicing instead of strptime (which consults
+# locale data on every call) and reuse a single timedelta constant.
+_OUTDATED_DELTA = timedelta(days=1)
+
+# Ticker validation happens only for rows whose symbol actually changed;
+# running the editor's per-cell validate regex over every row on every
+# rerun was wasted work for the untouched majority.
+_TICKER_RE = re.compile(r"^[A-Za-z0-9.\-]+$")
+
+
+# Config-derived constants resolved once at import instead of through
+# attribute chains on every rerun.
+_ASSET_TYPES = tuple(config.ui.asset_types)
+
+# Legacy Excel/UI key -> canonical model field name. Portfolios loaded from
+# older workbooks may still carry the capitalized variants; normalizing once
+# lets the hot paths below use a single dict lookup per field instead of
+# `d.get("foo") or d.get("Foo")` chains.
+_CANON = {
+    "Ticker": "symbol",
+    "Type": "asset_class",
+    "Currency": "currency",
+    "Quantity": "quantity",
+    "Avg_Cost": "avg_cost",
+    "Account_ID": "account_id",
+    "Manual_Price": "manual_price",
+    "Suggested_SL": "suggested_sl",
+    "Suggested_TP": "suggested_tp",
+    "Last_Update": "last_update",
+}
+
+
+# Columns extracted from portfolio dicts when building the editor frame.
+# Listing them explicitly lets DataFrame.from_records skip column inference.
+_CANONICAL_COLS = (
+    "asset_id", "symbol", "asset_type", "asset_class", "account_id",
+    "currency", "quantity", "avg_cost", "manual_price", "last_update",
+)
+
+
+def _canonicalize_asset(d: dict) -> dict:
+    """Rewrite legacy keys to canonical names in-place."""
+    for legacy, canon in _CANON.items():
+        if legacy in d:
+            if d.get(canon) is None:
+                d[canon] = d[legacy]
+            del d[legacy]
+    return d
+
+
+def _canonicalize_portfolio():
+    """Normalize every portfolio asset to canonical keys (idempotent)."""
+    for asset in st.session_state.get("portfolio", []):
+        _canonicalize_asset(asset)
+
+
+# Deferred imports for click handlers. Keeping them out of module import
+# preserves startup time, while the lru_cache ensures the sys.modules
+# lookup and attribute fetch happen once per process instead of per click.
+
+@functools.lru_cache(None)
+def _get_calculate_amortization_schedule():
+    from modules.loan_service import calculate_amortization_schedule
+    return calculate_amortization_schedule
+
+
+@functools.lru_cache(None)
+def _get_create_loan_plan():
+    from modules.loan_service import create_loan_plan
+    return create_loan_plan
+
+
+_DIRTY_KEY = "_portfolio_dirty"
+
+
+def _mark_dirty():
+    """Flag portfolio state as dirty; persisted once at end of the run."""
+    st.session_state[_DIRTY_KEY] = True
+
+
+def _save():
+    """Persist all session data in one call (single point for the arg list)."""
+    save_all_data(
+        st.session_state.accounts,
+        st.session_state.portfolio,
+        st.session_state.allocation_targets,
+        st.session_state.history_data,
+        st.session_state.get("loan_plans", []),
+    )
+
+
+def _state_digest():
+    """Content hash of everything _save would persist, or None if any of
+    it resists JSON serialization (in which case the caller saves anyway)."""
+    try:
+        payload = json.dumps(
+            (
+                st.session_state.accounts,
+                st.session_state.portfolio,
+                st.session_state.allocation_targets,
+                st.session_state.history_data,
+                st.session_state.get("loan_plans", []),
+            ),
+            default=str,
+            sort_keys=True,
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+
+def _flush_pending_save():
+    """Write all data once if any mutation this run marked state dirty.
+
+    A content hash short-circuits the write when a rerun re-marks state
+    dirty without actually changing anything (e.g. the dialog reruns
+    after a no-op edit) — the Drive upload is by far the slowest step in
+    the save path, so skipping identical payloads is worth the hash.
+    """
+    if not st.session_state.pop(_DIRTY_KEY, False):
+        return
+    digest = _state_digest()
+    if digest is not None and digest == st.session_state.get("_last_save_digest"):
+        return
+    _save()
+    if digest is not None:
+        st.session_state["_last_save_digest"] = digest
+
+
+@st.cache_resource(show_spinner=False)
+def _make_column_config(account_names: tuple) -> dict:
+    """
+    Build the data_editor column_config once per distinct account list.
+
+    The st.column_config objects are plain config holders, safe to reuse
+    across reruns; rebuilding them every frame only burns allocations.
+    """
+    return {
+        "Select": st.column_config.CheckboxColumn("選擇", width="small", default=False),
+        "Type": st.column_config.SelectboxColumn("類別", options=list(_ASSET_TYPES), width="small", required=True),
+        "Ticker": st.column_config.TextColumn("代號", width="small", required=True),
+        "Display_Currency": st.column_config.TextColumn("幣別", width="small", disabled=True),
+        "Display_Price": st.column_config.NumberColumn("現價", format="%.2f", disabled=True),
+        "Quantity": st.column_config.NumberColumn("持倉", min_value=0, step=0.0001, format="%.4f", required=True),
+        "Avg_Cost": st.column_config.NumberColumn("均價", min_value=0, step=0.01, format="%.2f", required=True),
+        "Account_Name": st.column_config.SelectboxColumn("帳戶", options=list(account_names), width="small", required=True),
+        "Display_Market_Value": st.column_config.NumberColumn("市值", format="%.0f", disabled=True),
+        "Display_Total_Cost": st.column_config.NumberColumn("總成本", format="%.0f", disabled=True),
+        "Display_PL": st.column_config.NumberColumn("損益", format="%.0f", disabled=True),
+        "ROI (%)": st.column_config.NumberColumn("ROI", format="%.1f%%", disabled=True),
+        "Last_Update": st.column_config.TextColumn("更新時間", width="medium", disabled=True),
+        "Status": st.column_config.TextColumn("狀態", width="small", disabled=True),
+    }
+
+
+def _accounts_key(accounts) -> tuple:
+    """Build a hashable (account_id, name) signature for the account list."""
+    return tuple(
+        (str(acc.get("account_id") or acc.get("id")), acc.get("name"))
+        for acc in accounts
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _build_account_maps(accounts_key: tuple) -> tuple:
+    """
+    Build account lookup maps once per distinct account list.
+
+    Args:
+        accounts_key: Tuple of (account_id, name) pairs from _accounts_key
+
+    Returns:
+        tuple: (accounts_map {id: name}, name_to_id_map {name: id},
+                id_to_index {id: position in the account list})
+    """
+    accounts_map = {aid: name for aid, name in accounts_key}
+    name_to_id_map = {name: aid for aid, name in accounts_key}
+    id_to_index = {aid: i for i, (aid, _) in enumerate(accounts_key)}
+    return accounts_map, name_to_id_map, id_to_index
+
+
+def _account_options(accounts) -> tuple:
+    """Cached account maps with the default-account fallback for empty lists."""
+    if accounts:
+        return _build_account_maps(_accounts_key(accounts))
+    return (
+        {"default_main": "主要帳戶"},
+        {"主要帳戶": "default_main"},
+        {"default_main": 0},
+    )
+
+
+def _portfolio_sig() -> tuple:
+    """Cheap hashable signature of the editable portfolio fields."""
+    return tuple(
+        (
+            a.get("symbol"), a.get("quantity"), a.get("avg_cost"),
+            a.get("account_id"), a.get("asset_type") or a.get("asset_class"),
+        )
+        for a in st.session_state.portfolio
+    )
+
+
+# Numeric fields converted to float64 arrays in the columnar snapshot.
+_NUMERIC_COLS = ("quantity", "avg_cost", "manual_price")
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _portfolio_columns(portfolio_sig, _portfolio) -> dict:
+    """
+    Columnar (structure-of-arrays) snapshot of the portfolio.
+
+    A single pass over the asset dicts yields one array per canonical field;
+    constructing the editor DataFrame from this dict is near-zero-copy for
+    the float columns. session_state.portfolio itself stays a list of dicts
+    because every mutation site (dialogs, persistence, market updates) works
+    record-wise on individual assets.
+
+    Args:
+        portfolio_sig: Signature from _portfolio_sig (cache key)
+        _portfolio: List of canonical asset dicts (unhashed)
+
+    Returns:
+        dict: {field: np.ndarray} for every column in _CANONICAL_COLS
+    """
+    n = len(_portfolio)
+    cols = {name: [None] * n for name in _CANONICAL_COLS}
+    for i, asset in enumerate(_portfolio):
+        get = asset.get
+        for name in _CANONICAL_COLS:
+            cols[name][i] = get(name)
+    return {
+        name: (
+            pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+            if name in _NUMERIC_COLS
+            else np.array(values, dtype=object)
+        )
+        for name, values in cols.items()
+    }
+
+
+def _market_sig(df_market_data) -> int:
+    """Cheap hashable signature of the market-data frame."""
+    if df_market_data.empty:
+        return 0
+    # O(1) fast path: market_service stamps each freshly built frame with a
+    # monotonic version, so any refetch — including a display-currency
+    # switch that leaves Ticker/Current_Price/Last_Update untouched but
+    # changes the Display_* columns — yields a new signature.
+    version = df_market_data.attrs.get('version')
+    if version is not None:
+        return int(version)
+    cols = [
+        c
+        for c in ("Ticker", "Current_Price", "Last_Update",
+                  "Display_Price", "Display_Currency", "Display_Market_Value", "Display_PL")
+        if c in df_market_data.columns
+    ]
+    # Promote each uint64 column hash to a Python int before summing to
+    # avoid fixed-width overflow warnings.
+    return sum(int(pd.util.hash_pandas_object(df_market_data[c]).sum()) for c in cols)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_df_merged(portfolio_sig, market_sig, accounts_key, _portfolio, _df_market_data):
+    """
+    Build the editor frame: portfolio columns enriched with market data.
+
+    Memoized on cheap signatures of the inputs; the heavy arguments are
+    underscore-prefixed so st.cache_data does not hash them.
+
+    Args:
+        portfolio_sig: Signature from _portfolio_sig
+        market_sig: Signature from _market_sig
+        accounts_key: Tuple of (account_id, name) pairs from _accounts_key
+        _portfolio: List of canonical asset dicts (unhashed)
+        _df_market_data: Market data DataFrame (unhashed)
+
+    Returns:
+        pd.DataFrame: df_merged ready for st.data_editor
+    """
+    # Build the frame from the cached columnar snapshot — a dict of numpy
+    # arrays assembles into a DataFrame without per-dict column inference.
+    df_raw = pd.DataFrame(_portfolio_columns(portfolio_sig, _portfolio))
+
+    # Display aliases over the canonical columns
+    df_raw["Ticker"] = df_raw["symbol"].fillna("")
+    df_raw["Type"] = df_raw["asset_type"].where(
+        df_raw["asset_type"].notna(), df_raw["asset_class"]
+    ).fillna("")
+    df_raw["Quantity"] = df_raw["quantity"].fillna(0.0)
+    df_raw["Avg_Cost"] = df_raw["avg_cost"].fillna(0.0)
+
+    # Enrich with market data. Tickers map to (at most) one market row,
+    # so an indexed column-wise .map() is cheaper than a full hash-join
+    # merge: no intermediate merged frame, no re-copy of df_raw columns.
+    df_merged = df_raw
+    if not _df_market_data.empty:
+        merge_cols = [
+            "Ticker", "Market_Value",
+            "Current_Price", "Last_Update", "ROI (%)", "Status",
+            "Display_Price", "Display_Cost_Basis", "Display_Market_Value",
+            "Display_Total_Cost", "Display_PL", "Display_Currency"
+        ]
+        merge_cols = [c for c in merge_cols if c in _df_market_data.columns]
+
+        mkt = _df_market_data[merge_cols].drop_duplicates("Ticker").set_index("Ticker")
+        tickers = df_merged["Ticker"]
+        for col in merge_cols:
+            if col == "Ticker":
+                continue
+            df_merged[col] = tickers.map(mkt[col])
+
+        if "Market_Value" not in df_merged.columns:
+            df_merged["Market_Value"] = 0
+        else:
+            df_merged["Market_Value"] = df_merged["Market_Value"].fillna(0)
+
+        if "Current_Price" not in df_merged.columns:
+            df_merged["Current_Price"] = 0
+        else:
+            df_merged["Current_Price"] = df_merged["Current_Price"].fillna(0)
+
+        if "Last_Update" not in df_merged.columns:
+            df_merged["Last_Update"] = "N/A"
+        else:
+            df_merged["Last_Update"] = df_merged["Last_Update"].fillna("N/A")
+    else:
+        df_merged["Market_Value"] = 0
+        df_merged["Current_Price"] = 0
+        df_merged["Last_Update"] = "N/A"
+
+    accounts_map, _, _ = _build_account_maps(accounts_key)
+    df_merged["Account_ID"] = df_merged["account_id"].fillna("default_main")
+    df_merged["Account_Name"] = df_merged["Account_ID"].map(accounts_map).fillna("未知")
+    df_merged["Select"] = False
+    return df_merged
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_ts(s: str) -> datetime:
+    """Parse a '%Y-%m-%d %H:%M' timestamp; memoized since the same
+    last_update strings recur across rows and reruns."""
+    return datetime(
+        int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16])
+    )
+
 
 def check_is_outdated(last_update_str):
     """Check if asset data is outdated (>24h)."""
     if not last_update_str or last_update_str == "N/A":
         return True
     try:
-        from datetime import timedelta
-        last_update_dt = datetime.strptime(last_update_str, "%Y-%m-%d %H:%M")
-        return datetime.now() - last_update_dt > timedelta(days=1)
-    except:
+        return datetime.now() - _parse_ts(last_update_str) > _OUTDATED_DELTA
+    except (ValueError, TypeError, IndexError):
         return True
 
 
@@ -37,15 +390,17 @@ def asset_action_dialog(index, asset):
         index: Asset index in portfolio
         asset: Asset dictionary
     """
-    # Map legacy keys if present (for safe migration)
-    ticker = asset.get("symbol") or asset.get("Ticker")
-    atype = asset.get("asset_class") or asset.get("Type")
-    curr = asset.get("currency") or asset.get("Currency")
-    avg_cost = asset.get("avg_cost")
-    if avg_cost is None: avg_cost = asset.get("Avg_Cost", 0.0)
-    qty = asset.get("quantity")
-    if qty is None: qty = asset.get("Quantity", 0.0)
-    
+    # Normalize legacy keys once, then read canonical fields directly
+    _canonicalize_asset(asset)
+    ticker = asset.get("symbol")
+    atype = asset.get("asset_class")
+    curr = asset.get("currency")
+    avg_cost = asset.get("avg_cost") or 0.0
+    qty = asset.get("quantity") or 0.0
+
+    # Account maps shared by the edit/move tabs (cached per distinct list)
+    _, acc_options, id_to_index = _account_options(st.session_state.get("accounts", []))
+
     st.header(f"管理：{ticker}")
     st.caption(f"類別: {atype} | 幣別: {curr}")
 
@@ -78,13 +433,7 @@ def asset_action_dialog(index, asset):
                 st.session_state.portfolio[index]["avg_cost"] = new_avg
                 st.session_state.portfolio[index]["quantity"] = new_qty
                 
-                # Update legacy keys if they exist
-                if "Avg_Cost" in st.session_state.portfolio[index]:
-                    st.session_state.portfolio[index]["Avg_Cost"] = new_avg
-                if "Quantity" in st.session_state.portfolio[index]:
-                    st.session_state.portfolio[index]["Quantity"] = new_qty
-                
-                save_all_data(st.session_state.accounts, st.session_state.portfolio, st.session_state.allocation_targets, st.session_state.history_data, st.session_state.get("loan_plans", []))
+                _mark_dirty()
                 st.session_state["force_refresh_market_data"] = True
                 st.success("加倉成功！")
                 st.rerun()
@@ -109,10 +458,7 @@ def asset_action_dialog(index, asset):
                 if st.session_state.portfolio[index]["quantity"] < 0:
                     st.session_state.portfolio[index]["quantity"] = 0
                 
-                if "Quantity" in st.session_state.portfolio[index]:
-                    st.session_state.portfolio[index]["Quantity"] = st.session_state.portfolio[index]["quantity"]
-                
-                save_all_data(st.session_state.accounts, st.session_state.portfolio, st.session_state.allocation_targets, st.session_state.history_data, st.session_state.get("loan_plans", []))
+                _mark_dirty()
                 st.session_state["force_refresh_market_data"] = True
                 st.success("減倉成功！")
                 st.rerun()
@@ -129,17 +475,10 @@ def asset_action_dialog(index, asset):
             "平均成本", min_value=0.0, value=float(avg_cost), key=f"fc_{index}"
         )
 
-        # Account modification
-        accounts = st.session_state.get("accounts", [])
-        acc_options = {acc["name"]: str(acc.get("account_id") or acc.get("id")) for acc in accounts} if accounts else {"主要帳戶": "default_main"}
-        
-        curr_acc_id = asset.get("account_id") or asset.get("Account_ID", "default_main")
+        # Account modification (maps built once at dialog top; O(1) default index)
+        curr_acc_id = asset.get("account_id") or "default_main"
         acc_names = list(acc_options.keys())
-        default_acc_index = 0
-        for i, name in enumerate(acc_names):
-            if acc_options[name] == curr_acc_id:
-                default_acc_index = i
-                break
+        default_acc_index = id_to_index.get(curr_acc_id, 0)
 
         sel_acc_name = st.selectbox("所屬帳戶", acc_names, index=default_acc_index, key=f"acc_edit_{index}")
 
@@ -155,7 +494,7 @@ def asset_action_dialog(index, asset):
                 if field in st.session_state.portfolio[index]:
                     del st.session_state.portfolio[index][field]
             
-            save_all_data(st.session_state.accounts, st.session_state.portfolio, st.session_state.allocation_targets, st.session_state.history_data, st.session_state.get("loan_plans", []))
+            _mark_dirty()
             st.session_state["force_refresh_market_data"] = True
             st.success("數據已更新")
             st.rerun()
@@ -167,10 +506,8 @@ def asset_action_dialog(index, asset):
         # IMPORTANT: Access portfolio directly to ensure modifications persist
         current_asset = st.session_state.portfolio[index]
         
-        accounts = st.session_state.get("accounts", [])
-        acc_options = {acc["name"]: str(acc.get("account_id") or acc.get("id")) for acc in accounts} if accounts else {"主要帳戶": "default_main"}
-        curr_acc_id = current_asset.get("account_id") or current_asset.get("Account_ID", "default_main")
-        
+        curr_acc_id = current_asset.get("account_id") or "default_main"
+
         target_acc_names = [name for name, aid in acc_options.items() if aid != curr_acc_id]
         
         if not target_acc_names:
@@ -181,20 +518,16 @@ def asset_action_dialog(index, asset):
             if st.button("確認移轉", key=f"btn_move_{index}", type="primary", use_container_width=True):
                 target_id = acc_options[target_name]
                 
-                # Update account_id and remove legacy fields to prevent conflicts
+                # Update account_id (legacy keys are stripped at dialog open)
                 st.session_state.portfolio[index]["account_id"] = target_id
                 
-                # Remove legacy field to ensure clean data
-                if "Account_ID" in st.session_state.portfolio[index]:
-                    del st.session_state.portfolio[index]["Account_ID"]
-                
                 # Debug logging
                 from modules.logger import get_logger
                 logger = get_logger(__name__)
                 asset_symbol = st.session_state.portfolio[index].get("symbol", "Unknown")
                 logger.info(f"Asset {asset_symbol} transferred from account to {target_id}")
                 
-                save_all_data(st.session_state.accounts, st.session_state.portfolio, st.session_state.allocation_targets, st.session_state.history_data, st.session_state.get("loan_plans", []))
+                _mark_dirty()
                 st.session_state["force_refresh_market_data"] = True
                 st.success(f"已移轉至 {target_name}")
                 st.rerun()
@@ -238,9 +571,17 @@ def asset_action_dialog(index, asset):
             help="停利目標相對於停損的倍數"
         )
         
-        if st.button("🔍 計算建議線", key=f"calc_risk_{index}", type="primary"):
-            from modules.risk_management import suggest_sl_tp_for_holding
-            
+        col_calc, col_recalc = st.columns(2)
+        run_calc = col_calc.button("🔍 計算建議線", key=f"calc_risk_{index}", type="primary")
+        if col_recalc.button(
+            "🔄 重新計算",
+            key=f"recalc_risk_{index}",
+            help="清除快取並重新抓取最新行情",
+        ):
+            suggest_sl_tp_for_holding.clear()
+            run_calc = True
+
+        if run_calc:
             with st.spinner(f"正在計算 {ticker} 的風控建議..."):
                 result = suggest_sl_tp_for_holding(
                     ticker=ticker,
@@ -282,22 +623,26 @@ def asset_action_dialog(index, asset):
             
             st.divider()
             
+            # Native widgets instead of raw HTML cards: the frontend can
+            # diff/reuse them across reruns instead of re-parsing markup.
             col_sl, col_tp = st.columns(2)
-            col_sl.markdown(f"""
-            <div style='background-color: #ffebee; padding: 15px; border-radius: 10px; border-left: 4px solid #f44336;'>
-                <h4 style='margin: 0; color: #c62828;'>🔴 建議停損 (SL)</h4>
-                <h2 style='margin: 5px 0; color: #c62828;'>{curr} {result['sl_price']:.2f}</h2>
-                <p style='margin: 0; font-size: 12px; color: #666;'>風險: {result['current_risk']:.2f}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            col_tp.markdown(f"""
-            <div style='background-color: #e8f5e9; padding: 15px; border-radius: 10px; border-left: 4px solid #4caf50;'>
-                <h4 style='margin: 0; color: #2e7d32;'>🟢 建議停利 (TP)</h4>
-                <h2 style='margin: 5px 0; color: #2e7d32;'>{curr} {result['tp_price']:.2f}</h2>
-                <p style='margin: 0; font-size: 12px; color: #666;'>目標: {result['current_reward']:.2f}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            with col_sl.container(border=True):
+                st.markdown("#### 🔴 建議停損 (SL)")
+                st.metric(
+                    "停損價",
+                    f"{curr} {result['sl_price']:.2f}",
+                    delta=f"風險 {result['current_risk']:.2f}",
+                    delta_color="inverse",
+                    label_visibility="collapsed",
+                )
+            with col_tp.container(border=True):
+                st.markdown("#### 🟢 建議停利 (TP)")
+                st.metric(
+                    "停利價",
+                    f"{curr} {result['tp_price']:.2f}",
+                    delta=f"目標 {result['current_reward']:.2f}",
+                    label_visibility="collapsed",
+                )
             
             st.divider()
             
@@ -305,12 +650,8 @@ def asset_action_dialog(index, asset):
                 # Modify the original asset in session_state.portfolio
                 st.session_state.portfolio[index]["suggested_sl"] = result['sl_price']
                 st.session_state.portfolio[index]["suggested_tp"] = result['tp_price']
-                if "Suggested_SL" in st.session_state.portfolio[index]:
-                    st.session_state.portfolio[index]["Suggested_SL"] = result['sl_price']
-                if "Suggested_TP" in st.session_state.portfolio[index]:
-                    st.session_state.portfolio[index]["Suggested_TP"] = result['tp_price']
                 
-                save_all_data(st.session_state.accounts, st.session_state.portfolio, st.session_state.allocation_targets, st.session_state.history_data, st.session_state.get("loan_plans", []))
+                _mark_dirty()
                 st.success(f"✅ 已儲存 {ticker} 的停損停利建議！")
                 st.rerun()
 
@@ -318,7 +659,7 @@ def asset_action_dialog(index, asset):
         st.warning("⚠️ 刪除操作無法復原！")
         if st.button("❌ 確認刪除", key=f"btn_del_{index}", type="primary"):
             st.session_state.portfolio.pop(index)
-            save_all_data(st.session_state.accounts, st.session_state.portfolio, st.session_state.allocation_targets, st.session_state.history_data, st.session_state.get("loan_plans", []))
+            _mark_dirty()
             st.session_state["force_refresh_market_data"] = True
             st.rerun()
 
@@ -331,11 +672,10 @@ def add_asset_dialog():
     # Select Type and Account
     c_type, c_acc = st.columns(2)
     with c_type:
-        atype = st.selectbox("資產類別", config.ui.asset_types)
+        atype = st.selectbox("資產類別", _ASSET_TYPES, key="add_type")
     with c_acc:
-        accounts = st.session_state.get("accounts", [])
-        acc_options = {acc["name"]: str(acc.get("account_id") or acc.get("id")) for acc in accounts} if accounts else {"主要帳戶": "default_main"}
-        sel_acc_name = st.selectbox("所屬帳戶", list(acc_options.keys()))
+        _, acc_options, _ = _account_options(st.session_state.get("accounts", []))
+        sel_acc_name = st.selectbox("所屬帳戶", list(acc_options.keys()), key="add_acc")
         sel_acc_id = acc_options[sel_acc_name]
 
     is_financial = atype in ["現金", "負債"]
@@ -345,9 +685,9 @@ def add_asset_dialog():
         # Cash/Liability flow
         c_name, c_curr = st.columns([2, 1])
         with c_name:
-            custom_name = st.text_input("項目名稱 (選填)", placeholder="例如：房貸、定存")
+            custom_name = st.text_input("項目名稱 (選填)", placeholder="例如：房貸、定存", key="add_name")
         with c_curr:
-            curr = st.selectbox("幣別", ["USD", "TWD"], index=1)
+            curr = st.selectbox("幣別", ["USD", "TWD"], index=1, key="add_fin_curr")
             
         # Sub-type for more specific classification
         if atype == "負債":
@@ -361,12 +701,12 @@ def add_asset_dialog():
             sub_type_label = "子類型"
         
         if sub_type_options:
-            sub_type = st.selectbox(sub_type_label, sub_type_options)
+            sub_type = st.selectbox(sub_type_label, sub_type_options, key="add_sub_type")
         else:
             sub_type = None
             
         c_amt, c_ph = st.columns([2, 1])
-        amount = c_amt.number_input("金額/餘額", min_value=0.0, value=0.0, step=1000.0)
+        amount = c_amt.number_input("金額/餘額", min_value=0.0, value=0.0, step=1000.0, key="add_amount")
         
         # Loan plan option
         create_plan = False
@@ -376,55 +716,60 @@ def add_asset_dialog():
         
         if atype == "負債":
             st.markdown("---")
-            create_plan = st.toggle("規劃還款計劃?", value=False)
+            create_plan = st.toggle("規劃還款計劃?", value=False, key="add_create_plan")
             
             if create_plan:
                 with st.container(border=True):
                     st.caption("還款計劃設定 (本息攤還試算)")
                     lp1, lp2, lp3 = st.columns(3)
-                    plan_rate = lp1.number_input("年利率 (%)", min_value=0.0, value=2.0, step=0.1)
-                    plan_years = lp2.number_input("還款年限", min_value=1, value=20, step=1)
-                    plan_start = lp3.date_input("開始日期", value=datetime.now())
+                    plan_rate = lp1.number_input("年利率 (%)", min_value=0.0, value=2.0, step=0.1, key="add_plan_rate")
+                    plan_years = lp2.number_input("還款年限", min_value=1, value=20, step=1, key="add_plan_years")
+                    plan_start = lp3.date_input("開始日期", value=datetime.now(), key="add_plan_start")
                     
                     if st.button("📊 試算還款表", key="btn_calc_plan"):
-                        from modules.loan_service import calculate_amortization_schedule
-                        schedule = calculate_amortization_schedule(amount, plan_rate, plan_years * 12, str(plan_start))
+                        schedule = _get_calculate_amortization_schedule()(amount, plan_rate, plan_years * 12, str(plan_start))
                         if schedule:
                             first_pmt = schedule[0].payment_amount
                             total_interest = sum(item.interest_paid for item in schedule)
                             st.info(f"首期還款: {first_pmt:,.0f} | 總利息: {total_interest:,.0f}")
-                            
-                            df_sch = pd.DataFrame([s.to_dict() for s in schedule])
+
+                            # Column-wise construction: the chart only needs
+                            # two fields, so skip the per-entry to_dict()
+                            # round trip and pandas column inference.
+                            df_sch = pd.DataFrame({
+                                "payment_number": [s.payment_number for s in schedule],
+                                "remaining_balance": [s.remaining_balance for s in schedule],
+                            })
                             st.line_chart(df_sch, x="payment_number", y="remaining_balance", height=200)
     else:
         # Investment assets flow
         st.markdown("---")
         c_s, c_r = st.columns([2, 3])
-        q = c_s.text_input("搜尋代號", placeholder="輸入如: TSLA, 2330...")
-        sel_search = c_r.selectbox("搜尋結果", search_yahoo_ticker(q) if q else [])
+        q = c_s.text_input("搜尋代號", placeholder="輸入如: TSLA, 2330...", key="add_search_q")
+        sel_search = c_r.selectbox("搜尋結果", search_yahoo_ticker(q) if q and len(q) >= 2 else [], key="add_search_sel")
         
         auto_t = sel_search.split(" | ")[0] if sel_search else ""
         
         c1, c2, c3 = st.columns(3)
-        ticker = c1.text_input("代號", value=auto_t).upper()
-        curr = c2.selectbox("幣別", ["USD", "TWD"], index=0)
-        qty = c3.number_input("持有數量", min_value=0.0, value=1.0, step=0.1)
+        ticker = c1.text_input("代號", value=auto_t, key="add_ticker").upper()
+        curr = c2.selectbox("幣別", ["USD", "TWD"], index=0, key="add_curr")
+        qty = c3.number_input("持有數量", min_value=0.0, value=1.0, step=0.1, key="add_qty")
         
-        cost = st.number_input("平均成本 (單價)", min_value=0.0, value=100.0, step=0.1)
+        cost = st.number_input("平均成本 (單價)", min_value=0.0, value=100.0, step=0.1, key="add_cost")
         
         # Optional: Sub-type for investments
-        sub_type = st.text_input("子類型 (選填)", placeholder="例如：成長股、價值股、ETF")
+        sub_type = st.text_input("子類型 (選填)", placeholder="例如：成長股、價值股、ETF", key="add_inv_sub_type")
         
         amount = 0
     
     # Common fields for all assets
     st.markdown("---")
     st.caption("📝 其他資訊 (選填)")
-    tags_input = st.text_input("標籤", placeholder="用逗號分隔，例如：核心,長期持有,科技")
-    note_input = st.text_area("備註", placeholder="補充說明", height=60)
+    tags_input = st.text_input("標籤", placeholder="用逗號分隔，例如：核心,長期持有,科技", key="add_tags")
+    note_input = st.text_area("備註", placeholder="補充說明", height=60, key="add_note")
 
     st.markdown("---")
-    if st.button("確認新增", type="primary", use_container_width=True):
+    if st.button("確認新增", key="add_confirm", type="primary", use_container_width=True):
         if not is_financial and not ticker:
             st.error("請輸入代號")
             return
@@ -457,9 +802,7 @@ def add_asset_dialog():
         st.session_state.portfolio.append(new_asset)
         
         if is_financial and create_plan:
-            from modules.loan_service import create_loan_plan
-            
-            new_plan = create_loan_plan(
+            new_plan = _get_create_loan_plan()(
                 asset_id=new_id,
                 total_amount=amount,
                 annual_rate=plan_rate,
@@ -471,115 +814,48 @@ def add_asset_dialog():
                 st.session_state.loan_plans = []
             st.session_state.loan_plans.append(new_plan.to_dict())
             
-        save_all_data(
-            st.session_state.accounts, 
-            st.session_state.portfolio, 
-            st.session_state.allocation_targets, 
-            st.session_state.history_data,
-            st.session_state.get("loan_plans", [])
-        )
+        _mark_dirty()
         st.session_state["force_refresh_market_data"] = True
         st.success(f"已新增 {atype} 項目")
         st.rerun()
 
 
+@st.fragment
 def render_asset_list_section(df_market_data, c_symbol):
     """
     Render asset list management section with inline editing.
-    
+
+    Runs as a fragment so widget interactions inside the table/dialogs
+    rerun only this section instead of the whole page.
+
     Args:
         df_market_data: Market data DataFrame
         c_symbol: Currency symbol for display
     """
     st.subheader("📋 資產清單管理")
-    
-    if st.button("➕ 新增資產", key="btn_add_new_asset", type="primary"):
-        add_asset_dialog()
 
     if not st.session_state.portfolio:
         st.info("目前無資產。")
         return
 
-    # Prepare data
-    df_raw = pd.DataFrame(st.session_state.portfolio)
-    df_raw["Original_Index"] = df_raw.index
-    
-    # Normalize columns - handle new and legacy field names
-    # Symbol/Ticker
-    if "symbol" in df_raw.columns:
-        df_raw["Ticker"] = df_raw["symbol"]
-    elif "Ticker" not in df_raw.columns:
-        df_raw["Ticker"] = ""
-    
-    # Type/asset_class/asset_type - prioritize new fields
-    if "asset_type" in df_raw.columns:
-        df_raw["Type"] = df_raw["asset_type"]
-    elif "asset_class" in df_raw.columns:
-        df_raw["Type"] = df_raw["asset_class"]
-    elif "Type" not in df_raw.columns:
-        df_raw["Type"] = ""
-
-    if "quantity" in df_raw.columns:
-         df_raw["Quantity"] = df_raw["quantity"]
-    elif "Quantity" not in df_raw.columns:
-         df_raw["Quantity"] = 0.0
-
-    if "avg_cost" in df_raw.columns:
-         df_raw["Avg_Cost"] = df_raw["avg_cost"]
-    elif "Avg_Cost" not in df_raw.columns:
-         df_raw["Avg_Cost"] = 0.0
-
-    # Merge with market data
-    if not df_market_data.empty:
-        merge_cols = [
-            "Ticker", "Market_Value",
-            "Current_Price", "Last_Update", "ROI (%)", "Status",
-            "Display_Price", "Display_Cost_Basis", "Display_Market_Value", 
-            "Display_Total_Cost", "Display_PL", "Display_Currency"
-        ]
-        merge_cols = [c for c in merge_cols if c in df_market_data.columns]
-        
-        df_merged = pd.merge(
-            df_raw, df_market_data[merge_cols], on="Ticker", how="left"
-        )
-        
-        if "Avg_Cost" not in df_merged.columns:
-             df_merged["Avg_Cost"] = 0.0
-
-        df_merged["Market_Value"] = df_merged["Market_Value"].fillna(0)
-        
-        if "Current_Price" not in df_merged.columns:
-            df_merged["Current_Price"] = 0
-        else:
-            df_merged["Current_Price"] = df_merged["Current_Price"].fillna(0)
-        
-        if "Last_Update" not in df_merged.columns:
-            df_merged["Last_Update"] = "N/A"
-        else:
-            df_merged["Last_Update"] = df_merged["Last_Update"].fillna("N/A")
-    else:
-        df_merged = df_raw
-        df_merged["Market_Value"] = 0
-        df_merged["Current_Price"] = 0
-        df_merged["Last_Update"] = "N/A"
-
-    # Account mapping
-    accounts_map = {
-        acc.get("account_id") or acc.get("id"): acc.get("name") 
-        for acc in st.session_state.get("accounts", [])
-    }
-    name_to_id_map = {v: k for k, v in accounts_map.items()}
-
-    df_merged.columns = df_merged.columns.astype(str).str.strip()
-    df_merged = df_merged.loc[:, ~df_merged.columns.duplicated()]
-
-    if "Account_ID" not in df_merged.columns:
-        df_merged["Account_ID"] = "default_main"
+    # Normalize legacy keys up front so the rest of this section (and the
+    # dialogs it opens) can rely on canonical field names.
+    _canonicalize_portfolio()
+
+    # Account mapping (cached; rebuilt only when the account list changes)
+    accounts_key = _accounts_key(st.session_state.get("accounts", []))
+    accounts_map, name_to_id_map, _ = _build_account_maps(accounts_key)
+
+    # Frame preparation is memoized on cheap signatures of the inputs, so
+    # reruns that only open/close dialogs or toggle checkboxes hit the cache.
+    df_merged = _build_df_merged(
+        _portfolio_sig(),
+        _market_sig(df_market_data),
+        accounts_key,
+        st.session_state.portfolio,
+        df_market_data,
+    )
 
-    df_merged["Account_ID"] = df_merged["Account_ID"].fillna("default_main")
-    df_merged["Account_Name"] = df_merged["Account_ID"].map(lambda x: accounts_map.get(x, "未知"))
-    df_merged["Select"] = False
-    
     st.info("💡 直接編輯表格內容可即時修改 (數量、成本、類別等)。勾選 [選擇] 欄位可進行進階操作 (風控、加減倉)。")
 
     editor_key = "asset_manager_editor_v2_fixed"
@@ -595,98 +871,93 @@ def render_asset_list_section(df_market_data, c_symbol):
             "Display_Total_Cost", "Display_PL", "ROI (%)", 
             "Last_Update", "Status"
         ],
-        column_config={
-            "Select": st.column_config.CheckboxColumn("選擇", width="small", default=False),
-            "Type": st.column_config.SelectboxColumn("類別", options=config.ui.asset_types, width="small", required=True),
-            "Ticker": st.column_config.TextColumn("代號", width="small", required=True, validate="^[A-Za-z0-9.-]+$"),
-            "Display_Currency": st.column_config.TextColumn("幣別", width="small", disabled=True),
-            "Display_Price": st.column_config.NumberColumn("現價", format="%.2f", disabled=True),
-            "Quantity": st.column_config.NumberColumn("持倉", min_value=0, step=0.0001, format="%.4f", required=True),
-            "Avg_Cost": st.column_config.NumberColumn("均價", min_value=0, step=0.01, format="%.2f", required=True),
-            "Account_Name": st.column_config.SelectboxColumn("帳戶", options=list(accounts_map.values()), width="small", required=True),
-            "Display_Market_Value": st.column_config.NumberColumn("市值", format="%.0f", disabled=True),
-            "Display_Total_Cost": st.column_config.NumberColumn("總成本", format="%.0f", disabled=True),
-            "Display_PL": st.column_config.NumberColumn("損益", format="%.0f", disabled=True),
-            "ROI (%)": st.column_config.NumberColumn("ROI", format="%.1f%%", disabled=True),
-            "Last_Update": st.column_config.TextColumn("更新時間", width="medium", disabled=True),
-            "Status": st.column_config.TextColumn("狀態", width="small", disabled=True),
-        },
+        column_config=_make_column_config(tuple(accounts_map.values())),
         hide_index=True,
         use_container_width=True,
         num_rows="fixed",
     )
 
-    # Change detection
-    changes_detected = False
-    selected_items = []
+    # Change detection — diff the edited frame against the pre-edit frame
+    # column-wise (rows are aligned because num_rows="fixed"); the frame is
+    # built from the portfolio in order, so row position IS the portfolio
+    # index and no Original_Index column needs to ride along to the browser.
+    portfolio_len = len(st.session_state.portfolio)
+
+    selected_items = [
+        (int(i), st.session_state.portfolio[i])
+        for i in np.flatnonzero(edited_df["Select"].to_numpy(dtype=bool))
+        if i < portfolio_len
+    ]
+
+    mask_qty = ~np.isclose(
+        edited_df["Quantity"].to_numpy(dtype=float),
+        df_merged["Quantity"].to_numpy(dtype=float),
+        rtol=0, atol=0.0001, equal_nan=True,
+    )
+    mask_cost = ~np.isclose(
+        edited_df["Avg_Cost"].to_numpy(dtype=float),
+        df_merged["Avg_Cost"].to_numpy(dtype=float),
+        rtol=0, atol=0.0001, equal_nan=True,
+    )
+    mask_sym = edited_df["Ticker"].astype(str).to_numpy() != df_merged["Ticker"].astype(str).to_numpy()
+    mask_type = edited_df["Type"].astype(str).to_numpy() != df_merged["Type"].astype(str).to_numpy()
+    mask_acc = edited_df["Account_Name"].astype(str).to_numpy() != df_merged["Account_Name"].astype(str).to_numpy()
 
-    for i, row in edited_df.iterrows():
-        orig_idx = int(row["Original_Index"])
-        if orig_idx < len(st.session_state.portfolio):
-            asset = st.session_state.portfolio[orig_idx]
-            
-            if row["Select"]:
-                selected_items.append((orig_idx, asset))
-            
-            def update_if_changed(key_main, key_legacy, new_val, is_float=False):
-                old_val = asset.get(key_main) or asset.get(key_legacy)
-                if old_val is None: old_val = 0.0 if is_float else ""
-                
-                changed = False
-                if is_float:
-                    if abs(float(new_val) - float(old_val)) > 0.0001: changed = True
-                else:
-                    if str(new_val) != str(old_val): changed = True
-                
-                if changed:
-                    asset[key_main] = new_val
-                    if key_legacy in asset: asset[key_legacy] = new_val
-                    return True
-                return False
-
-            c1 = update_if_changed("quantity", "Quantity", float(row["Quantity"]), True)
-            c2 = update_if_changed("avg_cost", "Avg_Cost", float(row["Avg_Cost"]), True)
-            c3 = update_if_changed("symbol", "Ticker", row["Ticker"], False)
-            
-            # Handle Type - update both asset_type and asset_class for compatibility
-            c4 = False
-            new_type = row["Type"]
-            old_type = asset.get("asset_type") or asset.get("asset_class") or asset.get("Type")
-            if str(new_type) != str(old_type):
-                asset["asset_type"] = new_type
-                asset["asset_class"] = new_type  # Keep legacy field
-                if "Type" in asset:
-                    del asset["Type"]  # Clean up legacy field
-                c4 = True
-            
-            c5 = False
-            new_acc_name = row["Account_Name"]
+    changes_detected = False
+    for i in np.flatnonzero(mask_qty | mask_cost | mask_sym | mask_type | mask_acc):
+        if i >= portfolio_len:
+            continue
+        asset = st.session_state.portfolio[i]
+        applied = False
+
+        if mask_qty[i]:
+            asset["quantity"] = float(edited_df["Quantity"].iat[i])
+            applied = True
+        if mask_cost[i]:
+            asset["avg_cost"] = float(edited_df["Avg_Cost"].iat[i])
+            applied = True
+        if mask_sym[i]:
+            new_sym = str(edited_df["Ticker"].iat[i])
+            if _TICKER_RE.match(new_sym):
+                asset["symbol"] = new_sym
+                applied = True
+            else:
+                st.error(f"無效的代號格式：{new_sym}（僅允許英數字、'.' 與 '-'）")
+
+        if mask_type[i]:
+            # Update both asset_type and asset_class for compatibility
+            new_type = edited_df["Type"].iat[i]
+            asset["asset_type"] = new_type
+            asset["asset_class"] = new_type  # Keep legacy field
+            if "Type" in asset:
+                del asset["Type"]  # Clean up legacy field
+            applied = True
+
+        if mask_acc[i]:
+            new_acc_name = edited_df["Account_Name"].iat[i]
             if new_acc_name in name_to_id_map:
                 new_acc_id = name_to_id_map[new_acc_name]
-                old_acc_id = asset.get("account_id") or asset.get("Account_ID", "default_main")
+                old_acc_id = asset.get("account_id") or "default_main"
                 if new_acc_id != old_acc_id:
                     asset["account_id"] = new_acc_id
-                    # Clean legacy field
-                    if "Account_ID" in asset:
-                        del asset["Account_ID"]
-                    c5 = True
-            
-            # Clean up legacy fields if any change was made
-            if c1 or c2 or c3:
-                # Remove legacy quantity/avg_cost/symbol fields
-                legacy_to_clean = ["Quantity", "Avg_Cost", "Ticker"]
-                for lf in legacy_to_clean:
-                    if lf in asset:
-                        del asset[lf]
-            
-            if c1 or c2 or c3 or c4 or c5:
-                changes_detected = True
+                    applied = True
+
+        if mask_qty[i] or mask_cost[i] or mask_sym[i]:
+            # Remove legacy quantity/avg_cost/symbol fields
+            for lf in ("Quantity", "Avg_Cost", "Ticker"):
+                if lf in asset:
+                    del asset[lf]
+
+        if applied:
+            changes_detected = True
 
     if changes_detected:
-        save_all_data(st.session_state.accounts, st.session_state.portfolio, st.session_state.allocation_targets, st.session_state.history_data, st.session_state.get("loan_plans", []))
+        _mark_dirty()
         st.session_state["force_refresh_market_data"] = True
         st.toast("✅ 資產資料已更新", icon="💾")
-        st.rerun()
+        # Market data is fetched outside the fragment, so escalate to a
+        # full-app rerun when portfolio edits require a refresh.
+        st.rerun(scope="app")
 
     # Handle selection
     if selected_items:
@@ -699,6 +970,10 @@ def render_asset_list_section(df_market_data, c_symbol):
         if len(selected_items) > 1:
             st.caption("⚠️ 偵測到多選，僅開啟第一項。")
 
+    # Coalesce all mutations from this run (and from dialogs, whose rerun
+    # lands here) into a single write.
+    _flush_pending_save()
+
 
 def render_asset_management(df_market_data, c_symbol):
     """
@@ -710,5 +985,13 @@ def render_asset_management(df_market_data, c_symbol):
     """
     st.title("💼 資產管理")
     st.caption("管理您的投資組合 - 新增、編輯、交易資產")
-    
+
+    # Outside the fragment: adding an asset must trigger a full-page
+    # refresh (market data fetch), not just a fragment rerun.
+    if st.button("➕ 新增資產", key="btn_add_new_asset", type="primary"):
+        add_asset_dialog()
+
     render_asset_list_section(df_market_data, c_symbol)
+
+    # Defensive: persist anything marked dirty outside the fragment.
+    _flush_pending_save()
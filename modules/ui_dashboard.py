@@ -5,19 +5,397 @@ This module provides UI rendering functions for the investment dashboard,
 including KPIs, rebalancing analysis, and portfolio details.
 """
 
+import string
+
 import streamlit as st
-import plotly.express as px
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Optional
 
 from config import get_config
 from modules.data_loader import save_snapshot
+from modules.market_service import type_value_sums
+from modules.state_manager import get_allocation_targets_np
 from modules.logger import get_logger
 
 config = get_config()
 logger = get_logger(__name__)
 
+# Streamlit's default DataFrame hashing pickles the whole frame; hashing the
+# row hashes is much cheaper and just as stable for cache keys.
+_DF_HASH_FUNCS = {
+    pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes()
+}
+
+# One shared frontend config for every chart: the mode bar is dead weight
+# in a dashboard and each button adds event handlers on the client.
+_PLOTLY_CONFIG = {'displayModeBar': False, 'responsive': True}
+
+# Layout defaults shared by the dashboard figures, registered once as a
+# plotly template. Builders opt in with template='ainvest' and keep only
+# their size/title overrides; the template engine merges the rest at
+# render time instead of each update_layout re-parsing the same dicts.
+# Applied per figure rather than as pio.templates.default so the tools
+# and risk-analysis pages keep their current styling.
+pio.templates['ainvest'] = go.layout.Template(layout=dict(
+    margin=dict(t=40, b=0, l=0, r=0),
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5),
+))
+
+# Precompiled HTML templates for the overview card loop: one format string
+# reused per row instead of rebuilding the f-string structure each pass.
+# Account card template compiled once at import; the hot loop below only
+# does the .substitute() dict merge instead of re-evaluating an f-string.
+_ACCOUNT_CARD_TPL = string.Template(
+    """<div class="css-card">
+        <div style='font-size: 1.1em; font-weight: bold; margin-bottom: 5px; color: #f1f5f9;'>🏦 $name</div>
+        <div style='font-size: 1.5em; font-weight: bold; color: $val_color; margin: 5px 0;'>$val_str</div>
+        <div style='color: #94a3b8; font-size: 0.85em; margin-bottom: 5px;'>佔比: $pct_str</div>
+        <div style='color: $pl_color; font-size: 0.9em; font-weight: bold;'>損益: $pl_str</div>
+        <div style='color: $roi_color; font-size: 0.9em;'>ROI: $roi_str</div>
+    </div>"""
+)
+
+# Advanced-chart constants, allocated once at import instead of per call.
+_MONTH_NAMES = ('1月', '2月', '3月', '4月', '5月', '6月', '7月', '8月', '9月', '10月', '11月', '12月')
+_HEATMAP_COLORSCALE = (
+    (0, '#d32f2f'),      # Deep red for negative
+    (0.4, '#f44336'),    # Red
+    (0.48, '#ffebee'),   # Light red
+    (0.5, '#ffffff'),    # White for zero
+    (0.52, '#e8f5e9'),   # Light green
+    (0.6, '#4caf50'),    # Green
+    (1, '#1b5e20')       # Deep green for positive
+)
+_CHART_OPTIONS = (
+    "🚀 淨資產成長趨勢（增強版）",
+    "🕸️ 資產配置雷達圖",
+    "🏆 Top 10 持倉績效",
+    "📊 月度報酬熱力圖"
+)
+
+# Top-10 holding card, compiled once like the account card above.
+_TOP_CARD_TPL = string.Template(
+    """<div class="css-card" style="border: 2px solid $badge_color; margin-bottom: 10px;">
+        <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;'>
+            <div>
+                <span style='background-color: $badge_color; color: white; padding: 4px 8px; border-radius: 5px; font-weight: bold; margin-right: 8px;'>#$rank</span>
+                <span style='font-size: 1.2em; font-weight: bold; color: #f1f5f9;'>$ticker</span>
+            </div>
+            <div style='text-align: right;'>
+                <div style='font-size: 0.85em; color: #94a3b8;'>$asset_type</div>
+            </div>
+        </div>
+        <div style='margin: 10px 0;'>
+            <div style='font-size: 1.4em; font-weight: bold; color: #818cf8;'>$mv_str</div>
+            <div style='font-size: 0.85em; color: #94a3b8;'>持倉: $qty_str | 成本: $cost_str</div>
+        </div>
+        <div style='display: flex; justify-content: space-between; margin-top: 10px;'>
+            <div>
+                <div style='font-size: 0.8em; color: #94a3b8;'>損益</div>
+                <div style='font-size: 1.1em; font-weight: bold; color: $pl_color;'>$pl_str</div>
+            </div>
+            <div style='text-align: right;'>
+                <div style='font-size: 0.8em; color: #94a3b8;'>ROI</div>
+                <div style='font-size: 1.1em; font-weight: bold; color: $roi_color;'>$roi_str</div>
+            </div>
+        </div>
+    </div>"""
+)
+
+_ROW_C2_TPL = (
+    "**<span style='{val_style}'>{val_str}</span>**"
+    "<div style='background:#eee; height:6px; border-radius:3px; margin:4px 0;'>"
+    "<div style='width:{safe_weight:.1f}%; background:#1f77b4; height:6px; border-radius:3px;'></div></div>"
+    "<span style='color:#94a3b8; font-size:0.8em'>全資產佔比: {type_weight:.1f}%</span>"
+)
+_ROW_C3_TPL = (
+    "<span style='color:{pl_color}; font-weight:bold'>{pl_str}</span>"
+    "<div style='background-color:{roi_bg}; color:{roi_color}; padding:4px; border-radius:4px;"
+    " text-align:center; width:80%; font-size:12px; font-weight:bold'>{roi_str}</div>"
+)
+
+
+def _moving_average(y: np.ndarray, window: int) -> np.ndarray:
+    """
+    Moving average equivalent to rolling(window, min_periods=1).mean().
+
+    The full windows reduce over a strided view (one contiguous, SIMD-
+    friendly mean along axis 1, no pandas rolling state machine); the
+    first window-1 slots take an expanding mean to honor min_periods=1.
+    Also sidesteps the cumsum formulation's error accumulation on long
+    series.
+
+    Args:
+        y: Input values
+        window: Window length in samples
+
+    Returns:
+        np.ndarray: Moving average, same length as y
+    """
+    out = np.empty(len(y), dtype='float64')
+    head = min(window - 1, len(y))
+    out[:head] = np.cumsum(y[:head], dtype='float64') / np.arange(1, head + 1)
+    if len(y) >= window:
+        out[window - 1:] = sliding_window_view(y, window).mean(axis=1)
+    return out
+
+
+def _df_signature(df_all: pd.DataFrame) -> tuple:
+    """
+    Cheap content signature for df_all, used as an explicit cache key.
+
+    The History column holds per-ticker price Series, which pandas cannot
+    hash row-wise, so it is excluded; every scalar column participates.
+
+    Args:
+        df_all: DataFrame with market data for all assets
+
+    Returns:
+        tuple: (row count, summed row hash) identifying the frame contents
+    """
+    # O(1) fast path: market_service stamps each freshly built frame with a
+    # monotonic version, so unchanged frames skip the content hash entirely.
+    version = df_all.attrs.get('version')
+    if version is not None:
+        return (len(df_all), int(version))
+
+    cols = df_all.columns.difference(['History'])
+    # Promote to Python int: summing uint64 hashes overflows numpy ints.
+    return (len(df_all), int(pd.util.hash_pandas_object(df_all[cols], index=False).sum()))
+
+
+@st.cache_data(show_spinner=False)
+def _compute_kpis(df_sig: tuple, _df_all: pd.DataFrame) -> tuple:
+    """
+    Compute the dashboard KPI aggregates once per distinct frame.
+
+    Args:
+        df_sig: Signature from _df_signature, acts as the cache key
+        _df_all: DataFrame with market data (unhashed, leading underscore)
+
+    Returns:
+        tuple: (assets_val, liabilities_val, g_cost, g_pl, g_roi)
+    """
+    df_all = _df_all
+    # Prefer the Category field (new data model); fall back to the legacy
+    # type columns for liability separation. One numpy mask + raw-array
+    # sums instead of repeated pandas boolean indexing.
+    if "Category" in df_all.columns and df_all["Category"].notna().any():
+        logger.debug("Using Category field for asset/liability separation")
+        is_liab = df_all['Category'].to_numpy() == 'liability'
+    else:
+        logger.debug("Using Type/asset_type/asset_class fields for asset/liability separation")
+        is_liab = np.zeros(len(df_all), dtype=bool)
+        for col in ('Type', 'asset_type', 'asset_class'):
+            if col in df_all.columns:
+                is_liab |= (df_all[col].to_numpy() == '負債')
+
+    is_asset = ~is_liab
+    mv = df_all['Market_Value'].to_numpy()
+    assets_val = mv[is_asset].sum()
+    liabilities_val = mv[is_liab].sum()
+    g_cost = df_all['Total_Cost'].to_numpy()[is_asset].sum()
+    g_pl = df_all['Unrealized_PL'].to_numpy().sum()  # PL of Assets + PL of Liabilities
+    g_roi = (g_pl / g_cost) * 100 if g_cost > 0 else 0
+    return assets_val, liabilities_val, g_cost, g_pl, g_roi
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _type_aggregates(df_sig: tuple, _df_all: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the per-type sums every dashboard section needs in one pass.
+
+    Args:
+        df_sig: Signature from _df_signature, acts as the cache key
+        _df_all: DataFrame with market data (unhashed, leading underscore)
+
+    Returns:
+        pd.DataFrame: Indexed by Type with Net_Value/Market_Value/
+        Total_Cost/Unrealized_PL sum columns
+    """
+    return _df_all.groupby('Type', observed=True, sort=False).agg(
+        Net_Value=('Net_Value', 'sum'),
+        Market_Value=('Market_Value', 'sum'),
+        Total_Cost=('Total_Cost', 'sum'),
+        Unrealized_PL=('Unrealized_PL', 'sum'),
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _account_aggregates(df_sig: tuple, _df_all: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the per-account sums for the account breakdown section.
+
+    Args:
+        df_sig: Signature from _df_signature, acts as the cache key
+        _df_all: DataFrame with market data (unhashed, leading underscore)
+
+    Returns:
+        pd.DataFrame: One row per Account_ID with the summed value columns
+    """
+    return _df_all.groupby('Account_ID', observed=True, sort=False).agg(
+        Net_Value=('Net_Value', 'sum'),
+        Market_Value=('Market_Value', 'sum'),
+        Total_Cost=('Total_Cost', 'sum'),
+        Unrealized_PL=('Unrealized_PL', 'sum'),
+    ).reset_index()
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS, max_entries=8)
+def _build_alloc_bar(alloc_df: pd.DataFrame) -> go.Figure:
+    """Build the current-vs-target allocation bar chart (cached)."""
+    colors = config.ui.colors
+    fig = go.Figure()
+    # .to_numpy() hands plotly a buffer it can serialize directly instead
+    # of round-tripping each Series through a Python list
+    x_types = alloc_df['Type'].to_numpy()
+    fig.add_trace(go.Bar(
+        x=x_types,
+        y=alloc_df['Current_Pct'].to_numpy(dtype=np.float32),
+        name='目前佔比',
+        marker_color=colors['primary_bar']
+    ))
+    fig.add_trace(go.Bar(
+        x=x_types,
+        y=alloc_df['Target_Pct'].to_numpy(dtype=np.float32),
+        name='目標佔比',
+        marker_color=colors['secondary_bar']
+    ))
+    fig.update_layout(
+        template='ainvest',
+        barmode='group',
+        uirevision='static',
+        height=250,
+        margin=dict(l=20, r=20, t=20, b=20),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS, max_entries=8)
+def _build_overview_charts(df: pd.DataFrame) -> go.Figure:
+    """
+    Build the overview allocation pie and ROI bar as one subplots figure.
+
+    One combined figure means a single plotly.js react() call and one
+    websocket delta instead of two (cached; expects Type/Market_Value/ROI).
+    """
+    fig = make_subplots(
+        rows=2, cols=1,
+        specs=[[{'type': 'domain'}], [{'type': 'xy'}]],
+        subplot_titles=("資產配置全貌", "類別績效比較"),
+        vertical_spacing=0.12,
+    )
+    # float32 halves the JSON payload plotly ships to the browser; chart
+    # display never needs float64 precision
+    types = df['Type'].to_numpy()
+    roi = df['ROI'].to_numpy(dtype=np.float32)
+    fig.add_trace(
+        go.Pie(labels=types, values=df['Market_Value'].to_numpy(dtype=np.float32), hole=0.5),
+        row=1, col=1,
+    )
+    fig.add_trace(
+        go.Bar(
+            x=roi, y=types, orientation='h',
+            marker=dict(color=roi, colorscale='RdYlGn'),
+        ),
+        row=2, col=1,
+    )
+    fig.update_layout(
+        template='ainvest',
+        uirevision='static',
+        height=480,
+        margin=dict(t=30, b=0, l=0, r=0),
+        showlegend=False,
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _build_ratio_pie(assets_val: float, abs_liabilities: float) -> go.Figure:
+    """Build the asset-vs-liability pie (cached on the two rounded totals)."""
+    fig = go.Figure(data=[go.Pie(
+        labels=['資產', '負債'],
+        values=[assets_val, abs_liabilities],
+        marker_colors=['#4CAF50', '#F44336'],
+        hole=0.4
+    )])
+    fig.update_layout(
+        template='ainvest',
+        title="資產 vs 負債",
+        height=200,
+        showlegend=True,
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _build_ratio_bar(assets_val: float, abs_liabilities: float, c_symbol: str) -> go.Figure:
+    """Build the asset-vs-liability amount bars (cached on the rounded totals)."""
+    fig = go.Figure(data=[
+        go.Bar(name='金額', x=['資產', '負債'], y=[assets_val, abs_liabilities],
+               marker_color=['#4CAF50', '#F44336'])
+    ])
+    fig.update_layout(
+        template='ainvest',
+        title="金額比較",
+        yaxis_title=f"金額 ({c_symbol})",
+        height=200,
+        showlegend=False
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS, max_entries=8)
+def _build_account_pie(df: pd.DataFrame) -> go.Figure:
+    """Build the account distribution pie (cached; expects Account_Name/Market_Value)."""
+    # Deferred: plotly.express pulls in a noticeable import chain, so only
+    # the px-based builders pay for it, on first use
+    import plotly.express as px
+    fig = px.pie(
+        df,
+        values="Market_Value",
+        names="Account_Name",
+        title="帳戶資產分佈",
+        hole=0.4
+    )
+    fig.update_layout(
+        template='ainvest',
+        height=250
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS, max_entries=8)
+def _build_account_roi_bar(df: pd.DataFrame) -> go.Figure:
+    """Build the account ROI comparison bar (cached; expects Account_Name/ROI)."""
+    import plotly.express as px
+    fig = px.bar(
+        df,
+        x="ROI",
+        y="Account_Name",
+        orientation="h",
+        title="帳戶績效比較",
+        color="ROI",
+        color_continuous_scale="RdYlGn"
+    )
+    fig.update_layout(
+        template='ainvest',
+        uirevision='static',
+        xaxis_title="ROI (%)",
+        yaxis_title=None,
+        height=250,
+        coloraxis_showscale=False
+    )
+    return fig
+
 
 def render_asset_liability_ratio(df_all: pd.DataFrame, assets_val: float, liabilities_val: float, c_symbol: str) -> None:
     """
@@ -79,37 +457,14 @@ def render_asset_liability_ratio(df_all: pd.DataFrame, assets_val: float, liabil
     if abs_liabilities > 0:
         col_chart1, col_chart2 = st.columns(2)
         
+        # Round the cache keys so sub-cent drift doesn't force a rebuild
+        a_val = round(float(assets_val), 2)
+        l_val = round(float(abs_liabilities), 2)
         with col_chart1:
-            # Pie chart
-            fig_pie = go.Figure(data=[go.Pie(
-                labels=['資產', '負債'],
-                values=[assets_val, abs_liabilities],
-                marker_colors=['#4CAF50', '#F44336'],
-                hole=0.4
-            )])
-            fig_pie.update_layout(
-                title="資產 vs 負債",
-                margin=dict(t=40, b=0, l=0, r=0),
-                height=200,
-                showlegend=True,
-                legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5)
-            )
-            st.plotly_chart(fig_pie, use_container_width=True)
-        
+            st.plotly_chart(_build_ratio_pie(a_val, l_val), use_container_width=True, config=_PLOTLY_CONFIG)
+
         with col_chart2:
-            # Bar chart comparison
-            fig_bar = go.Figure(data=[
-                go.Bar(name='金額', x=['資產', '負債'], y=[assets_val, abs_liabilities],
-                       marker_color=['#4CAF50', '#F44336'])
-            ])
-            fig_bar.update_layout(
-                title="金額比較",
-                yaxis_title=f"金額 ({c_symbol})",
-                margin=dict(t=40, b=0, l=0, r=0),
-                height=200,
-                showlegend=False
-            )
-            st.plotly_chart(fig_bar, use_container_width=True)
+            st.plotly_chart(_build_ratio_bar(a_val, l_val, c_symbol), use_container_width=True, config=_PLOTLY_CONFIG)
 
 
 def render_account_breakdown(df_all: pd.DataFrame, c_symbol: str) -> None:
@@ -139,60 +494,78 @@ def render_account_breakdown(df_all: pd.DataFrame, c_symbol: str) -> None:
     # df_all should have Account_ID or we need to merge from portfolio
     portfolio = st.session_state.get("portfolio", [])
     
-    # Create mapping of Ticker to Account_ID
-    ticker_to_account = {}
-    for asset in portfolio:
-        ticker = asset.get("symbol") or asset.get("Ticker")
-        acc_id = asset.get("account_id") or asset.get("Account_ID", "default_main")
-        ticker_to_account[ticker] = acc_id
-    
+    # Create the Ticker -> Account_ID mapping column-wise (canonical keys
+    # first, legacy Excel keys as fallback) instead of a per-asset loop.
+    if portfolio:
+        pdf = pd.DataFrame(portfolio)
+        tickers = pdf["symbol"] if "symbol" in pdf.columns else pd.Series(index=pdf.index, dtype=object)
+        if "Ticker" in pdf.columns:
+            tickers = tickers.fillna(pdf["Ticker"])
+        acc_ids = pdf["account_id"] if "account_id" in pdf.columns else pd.Series(index=pdf.index, dtype=object)
+        if "Account_ID" in pdf.columns:
+            acc_ids = acc_ids.fillna(pdf["Account_ID"])
+        ticker_to_account = pd.Series(
+            acc_ids.fillna("default_main").to_numpy(), index=tickers.to_numpy()
+        )
+    else:
+        ticker_to_account = pd.Series(dtype=object)
+
     # Add Account_ID to df_all if not present
     if "Account_ID" not in df_all.columns:
         df_all["Account_ID"] = df_all["Ticker"].map(ticker_to_account).fillna("default_main")
+
+    # Categorical codes make the account groupby key on integers instead of
+    # hashing strings; observed=True in the aggregator keeps unused
+    # categories from materializing rows.
+    if not isinstance(df_all["Account_ID"].dtype, pd.CategoricalDtype):
+        df_all["Account_ID"] = df_all["Account_ID"].astype("category")
     
-    # Group by account
-    account_totals = df_all.groupby("Account_ID").agg({
-        "Net_Value": "sum",
-        "Market_Value": "sum",
-        "Total_Cost": "sum",
-        "Unrealized_PL": "sum"
-    }).reset_index()
+    # Group by account (cached on the frame signature, so widget-only
+    # reruns skip the aggregation)
+    account_totals = _account_aggregates(_df_signature(df_all), df_all)
     
     # Calculate total for percentage
     total_all_accounts = account_totals["Net_Value"].sum()
-    
-    # Display account cards
-    num_accounts = len(account_totals)
-    cols_per_row = 3
-    
-    for i in range(0, num_accounts, cols_per_row):
-        cols = st.columns(cols_per_row)
-        for j in range(cols_per_row):
-            idx = i + j
-            if idx < num_accounts:
-                row = account_totals.iloc[idx]
-                acc_id = row["Account_ID"]
-                acc_name = account_map.get(acc_id, "未知帳戶")
-                acc_value = row["Net_Value"]
-                acc_cost = row["Total_Cost"]
-                acc_pl = row["Unrealized_PL"]
-                acc_roi = (acc_pl / acc_cost * 100) if acc_cost > 0 else 0
-                acc_pct = (acc_value / total_all_accounts * 100) if total_all_accounts > 0 else 0
-                
-                with cols[j]:
-                    pl_color = "#4ade80" if acc_pl >= 0 else "#f87171"
-                    roi_color = "#34d399" if acc_roi >= 0 else "#f87171"
-                    val_color = "#818cf8" if acc_value >= 0 else "#f87171" # Blue if positive, Red if debt
-                    
-                    st.markdown(f"""
-                    <div class="css-card">
-                        <div style='font-size: 1.1em; font-weight: bold; margin-bottom: 5px; color: #f1f5f9;'>🏦 {acc_name}</div>
-                        <div style='font-size: 1.5em; font-weight: bold; color: {val_color}; margin: 5px 0;'>{c_symbol}{acc_value:,.0f}</div>
-                        <div style='color: #94a3b8; font-size: 0.85em; margin-bottom: 5px;'>佔比: {acc_pct:.1f}%</div>
-                        <div style='color: {pl_color}; font-size: 0.9em; font-weight: bold;'>損益: {c_symbol}{acc_pl:,.0f}</div>
-                        <div style='color: {roi_color}; font-size: 0.9em;'>ROI: {acc_roi:+.1f}%</div>
-                    </div>
-                    """, unsafe_allow_html=True)
+
+    # Vectorized ROI/weight plus bulk-formatted strings: the card loop below
+    # only stitches ready-made pieces together. The ROI column is reused by
+    # the comparison chart further down.
+    cost = account_totals["Total_Cost"].to_numpy()
+    pl = account_totals["Unrealized_PL"].to_numpy()
+    account_totals["ROI"] = np.where(cost > 0, pl / np.where(cost > 0, cost, 1) * 100.0, 0.0)
+    rois = account_totals["ROI"].to_numpy()
+    vals = account_totals["Net_Value"].to_numpy()
+    pcts = (vals / total_all_accounts * 100.0) if total_all_accounts > 0 else np.zeros(len(vals))
+
+    money_fmt = (c_symbol + "{:,.0f}").format
+    names = account_totals["Account_ID"].map(account_map).fillna("未知帳戶").to_numpy()
+    val_strs = account_totals["Net_Value"].map(money_fmt).to_numpy()
+    pl_strs = account_totals["Unrealized_PL"].map(money_fmt).to_numpy()
+    roi_strs = account_totals["ROI"].map("{:+.1f}%".format).to_numpy()
+    pct_strs = pd.Series(pcts).map("{:.1f}%".format).to_numpy()
+
+    # Display account cards: one CSS grid in a single st.markdown instead of
+    # st.columns + one markdown per account, so the whole section is one
+    # delta message regardless of account count.
+    html_parts = []
+    for i in range(len(account_totals)):
+        html_parts.append(_ACCOUNT_CARD_TPL.substitute(
+            name=names[i],
+            val_color="#818cf8" if vals[i] >= 0 else "#f87171",  # Blue if positive, Red if debt
+            val_str=val_strs[i],
+            pct_str=pct_strs[i],
+            pl_color="#4ade80" if pl[i] >= 0 else "#f87171",
+            pl_str=pl_strs[i],
+            roi_color="#34d399" if rois[i] >= 0 else "#f87171",
+            roi_str=roi_strs[i],
+        ))
+
+    st.markdown(
+        "<div style='display:grid; grid-template-columns:repeat(3, 1fr); gap:1em;'>"
+        + "".join(html_parts)
+        + "</div>",
+        unsafe_allow_html=True,
+    )
     
     # Summary chart
     st.divider()
@@ -201,42 +574,19 @@ def render_account_breakdown(df_all: pd.DataFrame, c_symbol: str) -> None:
     with col_summary1:
         # Account distribution pie
         account_totals["Account_Name"] = account_totals["Account_ID"].map(account_map)
-        fig_acc_pie = px.pie(
-            account_totals,
-            values="Market_Value",
-            names="Account_Name",
-            title="帳戶資產分佈",
-            hole=0.4
+        st.plotly_chart(
+            _build_account_pie(account_totals[["Account_Name", "Market_Value"]]),
+            use_container_width=True,
+            config=_PLOTLY_CONFIG,
         )
-        fig_acc_pie.update_layout(
-            margin=dict(t=40, b=0, l=0, r=0),
-            height=250
-        )
-        st.plotly_chart(fig_acc_pie, use_container_width=True)
-    
+
     with col_summary2:
-        # Account ROI comparison
-        account_totals["ROI"] = account_totals.apply(
-            lambda x: (x["Unrealized_PL"] / x["Total_Cost"] * 100) if x["Total_Cost"] > 0 else 0,
-            axis=1
-        )
-        fig_acc_roi = px.bar(
-            account_totals,
-            x="ROI",
-            y="Account_Name",
-            orientation="h",
-            title="帳戶績效比較",
-            color="ROI",
-            color_continuous_scale="RdYlGn"
-        )
-        fig_acc_roi.update_layout(
-            xaxis_title="ROI (%)",
-            yaxis_title=None,
-            margin=dict(t=40, b=0, l=0, r=0),
-            height=250,
-            coloraxis_showscale=False
+        # Account ROI comparison (ROI precomputed with the card strings)
+        st.plotly_chart(
+            _build_account_roi_bar(account_totals[["Account_Name", "ROI"]]),
+            use_container_width=True,
+            config=_PLOTLY_CONFIG,
         )
-        st.plotly_chart(fig_acc_roi, use_container_width=True)
 
 
 def render_dashboard(df_all: pd.DataFrame, c_symbol: str, total_val: float, exchange_rate: float = 32.5) -> None:
@@ -253,13 +603,27 @@ def render_dashboard(df_all: pd.DataFrame, c_symbol: str, total_val: float, exch
         st.info("目前無資產數據，請前往管理頁面新增。")
         return
 
+    # Categorical Type makes every downstream groupby/unique O(K) in the
+    # number of categories; all groupbys here pass observed=True so unused
+    # categories never materialize rows.
+    if not isinstance(df_all['Type'].dtype, pd.CategoricalDtype):
+        df_all = df_all.assign(Type=df_all['Type'].astype('category'))
+
+    # One signature per rerun gates every cached aggregate below: when the
+    # frame is unchanged (widget-only reruns) the heavy scans are all skipped.
+    df_sig = _df_signature(df_all)
+
+    # One per-type aggregation shared by the snapshot breakdown, rebalancing
+    # and holdings sections instead of each redoing its own groupby. The
+    # market-value Series also rides along on attrs for renderers that only
+    # receive df_all (e.g. the radar chart).
+    type_agg = _type_aggregates(df_sig, df_all)
+    df_all.attrs['type_mv'] = type_agg['Market_Value']
+
     # 0. Snapshot Button
     c1, c2 = st.columns([0.8, 0.2])
     with c2:
         if st.button("📸 儲存今日快照", use_container_width=True, help="儲存當前總資產快照至歷史紀錄"):
-            # Calculate breakdown
-            breakdown = df_all.groupby('Type')['Market_Value'].sum().to_dict()
-            
             # Determine TWD/USD total
             # Assumes total_val is in Display Currency
             is_usd = "$" in c_symbol and "NT" not in c_symbol
@@ -275,71 +639,42 @@ def render_dashboard(df_all: pd.DataFrame, c_symbol: str, total_val: float, exch
             # If display is USD, breakdown is USD. save_snapshot expects 'value' (doesn't specify curr, but HistoryRecord has TWD/USD totals).
             # The breakdown fields in HistoryRecord are us_stock_val, etc. usually in base currency (TWD).
             # We should standardize breakdown to TWD for consistency or store both?
-            # Creating a simple map: Type -> TWD Value
-            breakdown_twd = {}
-            for k, v in breakdown.items():
-                if is_usd:
-                    breakdown_twd[k] = v * exchange_rate
-                else:
-                    breakdown_twd[k] = v
-                    
-            save_snapshot(tot_twd, tot_usd, breakdown_twd)
+            # Creating a simple map: Type -> TWD Value, converted in one
+            # Series multiply off the shared per-type aggregates.
+            breakdown_mv = type_agg['Market_Value']
+            if is_usd:
+                breakdown_mv = breakdown_mv * exchange_rate
+            save_snapshot(tot_twd, tot_usd, breakdown_mv.to_dict())
             st.success("已儲存快照！")
             
     # 0.5 History Chart (replaced with advanced charts selector)
+    # An expander body still executes while collapsed, so the chart work is
+    # additionally gated on a toggle and skipped until asked for.
     if "history_data" in st.session_state and st.session_state.history_data:
         with st.expander("📈 歷史趨勢", expanded=False):
-            render_history_chart(st.session_state.history_data, c_symbol)
-    
+            if st.toggle("顯示趨勢圖", value=False, key="history_show_chart"):
+                render_history_chart(st.session_state.history_data, c_symbol)
+
     # 0.6 Advanced Charts Section (NEW)
     with st.expander("📊 進階圖表分析", expanded=True):
-        render_advanced_charts_section(df_all, total_val, c_symbol, exchange_rate)
+        if st.toggle("啟用進階圖表", value=True, key="adv_charts_enabled"):
+            render_advanced_charts_section(df_all, total_val, c_symbol, exchange_rate)
 
     # 1. KPI 區塊
     st.markdown("### 🏆 總資產概況 (Net Worth)")
     # For KPIs, we use the Base Currency (total_val is already Net Worth in Base)
     # But we might want to separate Assets and Liabilities
     
-    # Calculate Total Assets (Positive Net Value) and Total Liabilities (Negative Net Value)
-    # Use Category field (more reliable for new data model), with fallback to Type field
-    
-    # Method 1: Try to use Category field if available
-    if "Category" in df_all.columns and df_all["Category"].notna().any():
-        logger.debug("Using Category field for asset/liability separation")
-        assets_mask = df_all['Category'] != 'liability'
-        liabilities_mask = df_all['Category'] == 'liability'
-        assets_val = df_all[assets_mask]['Market_Value'].sum()
-        liabilities_val = df_all[liabilities_mask]['Market_Value'].sum()
-        g_cost = df_all[assets_mask]['Total_Cost'].sum()
-    else:
-        # Method 2: Fallback to Type/asset_type/asset_class fields
-        logger.debug("Using Type/asset_type/asset_class fields for asset/liability separation")
-        
-        # Create liability mask checking multiple possible field names
-        liabilities_mask = pd.Series([False] * len(df_all), index=df_all.index)
-        
-        # Check all possible field names for liability markers
-        if 'Type' in df_all.columns:
-            liabilities_mask |= (df_all['Type'] == '負債')
-        if 'asset_type' in df_all.columns:
-            liabilities_mask |= (df_all['asset_type'] == '負債')
-        if 'asset_class' in df_all.columns:
-            liabilities_mask |= (df_all['asset_class'] == '負債')
-        
-        assets_mask = ~liabilities_mask
-        
-        assets_val = df_all[assets_mask]['Market_Value'].sum()
-        liabilities_val = df_all[liabilities_mask]['Market_Value'].sum()
-        g_cost = df_all[assets_mask]['Total_Cost'].sum()
-    
+    # Calculate Total Assets (Positive Net Value) and Total Liabilities
+    # (Negative Net Value). Cached on the frame hash so widget-only reruns
+    # skip the mask+sum scans entirely.
+    assets_val, liabilities_val, g_cost, g_pl, g_roi = _compute_kpis(df_sig, df_all)
+
     logger.info(f"Dashboard KPI: Assets={assets_val:,.0f}, Liabilities={liabilities_val:,.0f}")
-    
-    g_pl = df_all['Unrealized_PL'].sum() # PL of Assets + PL of Liabilities
-    g_roi = (g_pl / g_cost) * 100 if g_cost > 0 else 0
-    
-    # Custom Card KPI Layout
-    cols = st.columns(4)
 
+    # Custom Card KPI Layout. Like the account cards, the four KPI cards
+    # ship as a single CSS-grid markdown instead of st.columns(4) plus one
+    # st.markdown per card: one delta message instead of eight.
     metrics = [
         {
             "label": "淨資產 (Net Worth)",
@@ -367,15 +702,20 @@ def render_dashboard(df_all: pd.DataFrame, c_symbol: str, total_val: float, exch
         }
     ]
 
-    for i, m in enumerate(metrics):
-        with cols[i]:
-            st.markdown(f"""
-            <div class="css-card">
-                <div style="color: #666; font-size: 0.9em; margin-bottom: 5px;">{m['label']}</div>
-                <div style="font-size: 1.8em; font-weight: bold; color: {m['color']};">{m['value']}</div>
-                <div style="color: #999; font-size: 0.8em; margin-top: 5px;">{m['sub']}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    kpi_cards = [
+        f"""<div class="css-card">
+            <div style="color: #666; font-size: 0.9em; margin-bottom: 5px;">{m['label']}</div>
+            <div style="font-size: 1.8em; font-weight: bold; color: {m['color']};">{m['value']}</div>
+            <div style="color: #999; font-size: 0.8em; margin-top: 5px;">{m['sub']}</div>
+        </div>"""
+        for m in metrics
+    ]
+    st.markdown(
+        "<div style='display:grid; grid-template-columns:repeat(4, 1fr); gap:1em;'>"
+        + "".join(kpi_cards)
+        + "</div>",
+        unsafe_allow_html=True
+    )
     
     st.divider()
 
@@ -388,14 +728,15 @@ def render_dashboard(df_all: pd.DataFrame, c_symbol: str, total_val: float, exch
     st.divider()
 
     # 4. 再平衡分析
-    render_rebalancing(df_all, total_val, c_symbol)
+    render_rebalancing(df_all, total_val, c_symbol, type_agg=type_agg)
     st.divider()
 
     # 5. 持股明細
-    render_holdings_section(df_all, total_val, c_symbol)
+    render_holdings_section(df_all, total_val, c_symbol, type_agg=type_agg)
 
 
-def render_rebalancing(df_all: pd.DataFrame, total_val: float, c_symbol: str) -> None:
+def render_rebalancing(df_all: pd.DataFrame, total_val: float, c_symbol: str,
+                       type_agg: Optional[pd.DataFrame] = None) -> None:
     """
     Render asset allocation and rebalancing analysis.
     
@@ -403,59 +744,57 @@ def render_rebalancing(df_all: pd.DataFrame, total_val: float, c_symbol: str) ->
         df_all: DataFrame with market data
         total_val: Total portfolio value
         c_symbol: Currency symbol
+        type_agg: Precomputed per-type aggregates from _type_aggregates
     """
     st.markdown("### ⚖️ 資產配置與再平衡")
-    
-    current_alloc = df_all.groupby('Type')['Market_Value'].sum()
-    current_alloc_pct = (current_alloc / total_val * 100).reset_index()
-    current_alloc_pct.columns = ['Type', 'Current_Pct']
-    
-    targets = st.session_state.allocation_targets
-    target_df = pd.DataFrame(list(targets.items()), columns=['Type', 'Target_Pct'])
-    
-    alloc_df = pd.merge(target_df, current_alloc_pct, on='Type', how='outer').fillna(0)
+
+    if type_agg is None:
+        type_agg = _type_aggregates(_df_signature(df_all), df_all)
+    current_pct = type_agg['Market_Value'] / total_val * 100
+
+    # Index-aligned reindex instead of an outer merge: same union-of-types
+    # result without the hash-join, and fill_value=0 avoids NaN propagation.
+    target_pct = pd.Series(st.session_state.allocation_targets, dtype='float64')
+    all_types = target_pct.index.union(current_pct.index, sort=False)
+    alloc_df = pd.DataFrame({
+        'Type': all_types,
+        'Target_Pct': target_pct.reindex(all_types, fill_value=0).to_numpy(),
+        'Current_Pct': current_pct.reindex(all_types, fill_value=0).to_numpy(),
+    })
     alloc_df['Diff'] = alloc_df['Current_Pct'] - alloc_df['Target_Pct']
     
     col1, col2 = st.columns([2, 1])
     with col1:
-        colors = config.ui.colors
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=alloc_df['Type'], 
-            y=alloc_df['Current_Pct'], 
-            name='目前佔比', 
-            marker_color=colors['primary_bar']
-        ))
-        fig.add_trace(go.Bar(
-            x=alloc_df['Type'], 
-            y=alloc_df['Target_Pct'], 
-            name='目標佔比', 
-            marker_color=colors['secondary_bar']
-        ))
-        fig.update_layout(
-            barmode='group',
-            height=250,
-            margin=dict(l=20, r=20, t=20, b=20),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        # Only build the figure when the user asks for it; the widget key
+        # keeps the choice in session state across reruns.
+        if st.toggle("顯示配置圖表", value=False, key="rebalance_show_chart"):
+            st.plotly_chart(_build_alloc_bar(alloc_df), use_container_width=True, config=_PLOTLY_CONFIG)
+        else:
+            st.caption("開啟開關以顯示目前 vs 目標配置圖。")
     
     with col2:
         st.write("**📊 建議操作**")
         tolerance = config.ui.allocation_tolerance_pct
-        for idx, row in alloc_df.iterrows():
-            diff = row['Diff']
-            if diff < -tolerance:
-                st.markdown(f"🔵 **{row['Type']}**: <span style='color:green'>不足 {abs(diff):.1f}%</span>", unsafe_allow_html=True)
-            elif diff > tolerance:
-                st.markdown(f"🟠 **{row['Type']}**: <span style='color:red'>超額 {abs(diff):.1f}%</span>", unsafe_allow_html=True)
-            else:
-                st.markdown(f"⚪ **{row['Type']}**: 準確")
+        # Classify all rows in one vectorized pass and emit a single
+        # markdown instead of one delta message per type.
+        diffs = alloc_df['Diff'].to_numpy()
+        types = alloc_df['Type'].to_numpy()
+        abs_strs = np.abs(diffs).round(1)
+        lines = np.select(
+            [diffs < -tolerance, diffs > tolerance],
+            [
+                [f"🔵 **{t}**: <span style='color:green'>不足 {a:.1f}%</span>"
+                 for t, a in zip(types, abs_strs)],
+                [f"🟠 **{t}**: <span style='color:red'>超額 {a:.1f}%</span>"
+                 for t, a in zip(types, abs_strs)],
+            ],
+            default=[f"⚪ **{t}**: 準確" for t in types],
+        )
+        st.markdown("<br>".join(lines), unsafe_allow_html=True)
 
 
-def render_holdings_section(df_all: pd.DataFrame, total_val: float, c_symbol: str) -> None:
+def render_holdings_section(df_all: pd.DataFrame, total_val: float, c_symbol: str,
+                            type_agg: Optional[pd.DataFrame] = None) -> None:
     """
     Render portfolio holdings section with filtering.
     
@@ -463,24 +802,55 @@ def render_holdings_section(df_all: pd.DataFrame, total_val: float, c_symbol: st
         df_all: DataFrame with market data
         total_val: Total portfolio value
         c_symbol: Currency symbol
+        type_agg: Precomputed per-type aggregates from _type_aggregates
     """
     st.markdown("### 📉 投資組合明細")
-    
+
     # 篩選器
-    available_types = ["全部"] + list(df_all['Type'].unique())
+    available_types = _available_types(df_all)
     selected_view = st.radio("選擇檢視模式：", available_types, horizontal=True, label_visibility="collapsed")
     
     st.markdown("---")
     
     if selected_view == "全部":
         # 模式 A: 顯示「各大類別」的總覽
-        render_category_overview(df_all, total_val, c_symbol)
+        render_category_overview(df_all, total_val, c_symbol, type_agg=type_agg)
     else:
         # 模式 B: 顯示「特定類別」內的個股明細
         render_single_category_detail(df_all, total_val, c_symbol, selected_view)
 
 
-def render_category_overview(df_all: pd.DataFrame, total_val: float, c_symbol: str) -> None:
+def _available_types(df_all: pd.DataFrame) -> list:
+    """
+    Get the view-mode options, memoized in session state.
+
+    The Type column rarely changes between reruns, so the O(N) unique scan
+    is skipped when a cheap signature of the column matches the cached one.
+
+    Args:
+        df_all: DataFrame with market data
+
+    Returns:
+        list: ["全部"] followed by the distinct Type values
+    """
+    type_col = df_all['Type']
+    if isinstance(type_col.dtype, pd.CategoricalDtype):
+        # O(K) — categories are already materialized
+        return ["全部"] + type_col.cat.categories.tolist()
+
+    # Promote to Python int: summing uint64 hashes overflows numpy ints.
+    sig = (len(df_all), int(pd.util.hash_pandas_object(type_col, index=False).sum()))
+    cached = st.session_state.get('_avail_types_cache')
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+
+    types = ["全部"] + list(type_col.unique())
+    st.session_state['_avail_types_cache'] = (sig, types)
+    return types
+
+
+def render_category_overview(df_all: pd.DataFrame, total_val: float, c_symbol: str,
+                             type_agg: Optional[pd.DataFrame] = None) -> None:
     """
     Render overview of all asset categories.
     
@@ -488,95 +858,167 @@ def render_category_overview(df_all: pd.DataFrame, total_val: float, c_symbol: s
         df_all: DataFrame with market data
         total_val: Total portfolio value
         c_symbol: Currency symbol
+        type_agg: Precomputed per-type aggregates from _type_aggregates
     """
-    # Group by Type and calculate metrics
-    df_grouped = df_all.groupby('Type').agg({
-        'Net_Value': 'sum',
-        'Market_Value': 'sum',
-        'Total_Cost': 'sum',
-        'Unrealized_PL': 'sum'
-    }).reset_index()
-    
-    # 計算 ROI
-    df_grouped['ROI'] = df_grouped.apply(
-        lambda x: (x['Unrealized_PL'] / x['Total_Cost'] * 100) if x['Total_Cost'] > 0 else 0, axis=1
-    )
+    if type_agg is None:
+        type_agg = _type_aggregates(_df_signature(df_all), df_all)
+    df_grouped = type_agg.reset_index()
+    if config.ui.hide_closed_positions:
+        # Hide categories whose positions have all been closed out
+        df_grouped = df_grouped[
+            df_grouped['Market_Value'].abs() > config.ui.closed_position_epsilon
+        ]
+    
+    # 計算 ROI (vectorized; guard the divisor so zero-cost rows yield 0)
+    tc = df_grouped['Total_Cost'].to_numpy()
+    pl = df_grouped['Unrealized_PL'].to_numpy()
+    df_grouped['ROI'] = np.where(tc > 0, pl / np.where(tc > 0, tc, 1) * 100.0, 0.0)
+
+    # Pre-format the display strings in one vectorized pass so the card loop
+    # below only reads ready-made columns.
+    money_fmt = (c_symbol + "{:,.0f}").format
+    df_grouped['val_str'] = df_grouped['Net_Value'].map(money_fmt)
+    df_grouped['pl_str'] = df_grouped['Unrealized_PL'].map(money_fmt)
+    df_grouped['roi_str'] = df_grouped['ROI'].map("{:.1f}%".format)
+    # Scalar branch once, divide column-wise — not per row in the card loop
+    df_grouped['Weight'] = (df_grouped['Market_Value'] / total_val * 100.0) if total_val > 0 else 0.0
     
     # 左右佈局
     col_list, col_charts = st.columns([0.65, 0.35], gap="large")
     
     # 左側：顯示各大類別的卡片
     with col_list:
-        # 表頭
-        h1, h2, h3 = st.columns([1.5, 1.2, 1.2])
-        h1.markdown("**資產類別**")
-        h2.caption("類別市值 & 佔比")
-        h3.caption("類別總損益 & ROI")
-        st.divider()
+        # Past a threshold the per-row card loop costs a handful of widgets
+        # per category; one virtualized st.dataframe stays O(visible rows).
+        if len(df_grouped) > config.ui.table_threshold:
+            st.dataframe(
+                df_grouped[['Type', 'Net_Value', 'Market_Value', 'Unrealized_PL', 'ROI']],
+                column_config={
+                    "Type": st.column_config.TextColumn("資產類別", pinned=True),
+                    "Net_Value": st.column_config.NumberColumn(f"淨值 ({c_symbol})", format=f"{c_symbol}%.0f"),
+                    "Market_Value": st.column_config.NumberColumn(f"市值 ({c_symbol})", format=f"{c_symbol}%.0f"),
+                    "Unrealized_PL": st.column_config.NumberColumn(f"損益 ({c_symbol})", format=f"{c_symbol}%.0f"),
+                    "ROI": st.column_config.ProgressColumn("ROI", format="%.1f%%", min_value=-50, max_value=50),
+                },
+                hide_index=True,
+                width="stretch",
+            )
+        else:
+            # 表頭
+            h1, h2, h3 = st.columns([1.5, 1.2, 1.2])
+            h1.markdown("**資產類別**")
+            h2.caption("類別市值 & 佔比")
+            h3.caption("類別總損益 & ROI")
+            st.divider()
         
-        for idx, row in df_grouped.iterrows():
-            type_weight = (row['Market_Value'] / total_val) * 100 if total_val > 0 else 0
+            # itertuples avoids materializing a Series per row the way iterrows does
+            for row in df_grouped.itertuples(index=False):
+                type_weight = row.Weight
             
-            with st.container():
-                c1, c2, c3 = st.columns([1.5, 1.2, 1.2])
-                with c1:
-                    st.subheader(f"📂 {row['Type']}")
+                with st.container():
+                    c1, c2, c3 = st.columns([1.5, 1.2, 1.2])
+                    with c1:
+                        st.subheader(f"📂 {row.Type}")
                 
-                with c2:
-                    # Logic for Display Value (Native vs Base) is tricky for Category Aggregation.
-                    # Category Sum implies Base Currency always, because you can't sum mixed currencies.
-                    # So Overview always uses Base Currency. Net_Value can be negative for Liabilities.
-                    val = row['Net_Value']
-                    val_color = "#f87171" if val < 0 else None
-                    val_style = f"color: {val_color};" if val_color else ""
-                    
-                    st.markdown(f"**<span style='{val_style}'>{c_symbol}{val:,.0f}</span>**", unsafe_allow_html=True)
-                    # For progress bar, we take absolute contribution or handle standard logic
-                    # If total_val (Net Worth) is positive, and this is liability, implicit weight is negative?
-                    # Streamlit progress bar needs 0.0-1.0
-                    
-                    safe_weight = abs(type_weight) # Use absolute for visual bar
-                    st.progress(min(safe_weight / 100, 1.0))
-                    st.caption(f"全資產佔比: {type_weight:.1f}%")
-                    
-                with c3:
-                    pl_color = "#4ade80" if row['Unrealized_PL'] >= 0 else "#f87171"
-                    st.markdown(f"<span style='color:{pl_color}; font-weight:bold'>{c_symbol}{row['Unrealized_PL']:,.0f}</span>", unsafe_allow_html=True)
+                    with c2:
+                        # Logic for Display Value (Native vs Base) is tricky for Category Aggregation.
+                        # Category Sum implies Base Currency always, because you can't sum mixed currencies.
+                        # So Overview always uses Base Currency. Net_Value can be negative for Liabilities.
+                        val = row.Net_Value
+                        val_color = "#f87171" if val < 0 else None
+                        val_style = f"color: {val_color};" if val_color else ""
                     
-                    roi_bg = "#e6fffa" if row['ROI'] > 0 else "#fff5f5"
-                    roi_color = "#009688" if row['ROI'] > 0 else "#e53e3e"
-                    st.markdown(
-                        f"<div style='background-color:{roi_bg}; color:{roi_color}; padding:4px; border-radius:4px; text-align:center; width:80%; font-size:12px; font-weight:bold'>"
-                        f"{row['ROI']:.1f}%</div>", 
-                        unsafe_allow_html=True
-                    )
-            st.divider()
+                        # One markdown per cell: each st.markdown/st.caption call is
+                        # its own delta message, so merged fragments halve the
+                        # per-row Streamlit IPC traffic. The weight bar is a plain
+                        # CSS div rather than st.progress, which would register a
+                        # full widget per row. Absolute weight for the visual bar;
+                        # liabilities would otherwise give a negative width.
+                        st.markdown(
+                            _ROW_C2_TPL.format_map({
+                                'val_style': val_style,
+                                'val_str': row.val_str,
+                                'safe_weight': min(abs(type_weight), 100),
+                                'type_weight': type_weight,
+                            }),
+                            unsafe_allow_html=True,
+                        )
+
+                    with c3:
+                        st.markdown(
+                            _ROW_C3_TPL.format_map({
+                                'pl_color': "#4ade80" if row.Unrealized_PL >= 0 else "#f87171",
+                                'pl_str': row.pl_str,
+                                'roi_bg': "#e6fffa" if row.ROI > 0 else "#fff5f5",
+                                'roi_color': "#009688" if row.ROI > 0 else "#e53e3e",
+                                'roi_str': row.roi_str,
+                            }),
+                            unsafe_allow_html=True
+                        )
+                st.divider()
 
     # 右側：顯示資產分佈圖 (Pie Chart of Types)
     with col_charts:
-        st.markdown("**📊 資產配置全貌**")
-        fig_pie = px.pie(df_grouped, values='Market_Value', names='Type', hole=0.5)
-        fig_pie.update_layout(
-            margin=dict(t=0, b=0, l=0, r=0),
-            height=250,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
-        
-        st.markdown("**📈 類別績效比較**")
-        fig_bar = px.bar(df_grouped, x='ROI', y='Type', orientation='h', color='ROI', color_continuous_scale='RdYlGn')
-        fig_bar.update_layout(
-            xaxis_title=None,
-            yaxis_title=None,
-            height=200,
-            margin=dict(t=0,b=0,l=0,r=0),
-            coloraxis_showscale=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
+        # Figure builders are cached on the minimal columns each chart needs,
+        # and skipped entirely until the user turns the charts on.
+        if st.toggle("顯示圖表", value=False, key="overview_show_charts"):
+            st.plotly_chart(
+                _build_overview_charts(df_grouped[['Type', 'Market_Value', 'ROI']]),
+                use_container_width=True,
+                config=_PLOTLY_CONFIG,
+            )
+        else:
+            st.caption("開啟開關以顯示配置與績效圖表。")
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _category_table(cat_sig: tuple, _cat_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Prepare the category detail table, cached on the frame signature.
+
+    Weight and Display_* fallbacks are computed column-wise, and the float
+    columns are rounded so st.dataframe serializes fewer digits per rerun.
+
+    Args:
+        cat_sig: Signature from _df_signature, acts as the cache key
+        _cat_df: Filtered/sorted category rows (unhashed, leading underscore)
+
+    Returns:
+        pd.DataFrame: Columns ready for the st.dataframe column_config
+    """
+    cat_val = _cat_df['Market_Value'].sum()
+
+    # Prefer the native-currency display price market_service produces,
+    # with a single vectorized fallback to the base price (no per-row
+    # .get calls). Values/PL stay in base currency so sums line up.
+    if 'Display_Price' in _cat_df.columns:
+        display_price = _cat_df['Display_Price'].where(
+            _cat_df['Display_Price'].notna(), _cat_df['Current_Price']
         )
-        st.plotly_chart(fig_bar, use_container_width=True)
+    else:
+        display_price = _cat_df['Current_Price']
+    if 'Display_Currency' in _cat_df.columns:
+        display_currency = _cat_df['Display_Currency']
+    else:
+        display_currency = _cat_df.get('Currency', '')
+
+    # Project + assign instead of mutating a full copy: one new frame with
+    # just the displayed columns, no write-backs into the source rows.
+    display_df = _cat_df[[
+        'Ticker', 'Quantity', 'Avg_Cost',
+        'Net_Value', 'Unrealized_PL', 'ROI (%)', 'Status', 'Last_Update'
+    ]].assign(
+        Display_Price=display_price,
+        Display_Currency=display_currency,
+        Cat_Weight=_cat_df['Market_Value'] / cat_val if cat_val > 0 else 0.0,
+    )[[
+        'Ticker', 'Quantity', 'Avg_Cost', 'Display_Price', 'Display_Currency',
+        'Net_Value', 'Unrealized_PL', 'ROI (%)', 'Cat_Weight', 'Status', 'Last_Update'
+    ]]
+    return display_df.round({
+        'Quantity': 2, 'Avg_Cost': 2, 'Display_Price': 2,
+        'Net_Value': 0, 'Unrealized_PL': 0, 'ROI (%)': 2, 'Cat_Weight': 4,
+    })
 
 
 def render_single_category_detail(df_all: pd.DataFrame, total_val: float, c_symbol: str, category: str) -> None:
@@ -589,9 +1031,17 @@ def render_single_category_detail(df_all: pd.DataFrame, total_val: float, c_symb
         c_symbol: Currency symbol
         category: Asset category to display
     """
-    # Filter data
-    cat_df = df_all[df_all['Type'] == category].copy()
-    
+    # Filter data; one descending sort by market value is shared by the
+    # table and the weight pie (which would otherwise re-sort internally).
+    cat_df = (
+        df_all[df_all['Type'] == category]
+        .sort_values('Market_Value', ascending=False, kind='stable')
+        .reset_index(drop=True)
+    )
+    if config.ui.hide_closed_positions:
+        # Closed positions would still render full table rows / chart slices
+        cat_df = cat_df[cat_df['Market_Value'].abs() > config.ui.closed_position_epsilon]
+
     if cat_df.empty:
         st.warning("此類別無資料")
         return
@@ -606,19 +1056,10 @@ def render_single_category_detail(df_all: pd.DataFrame, total_val: float, c_symb
 
     # 左側：個股清單 (改用 DataFrame)
     with col_list:
-        # Prepare data for st.dataframe
-
-        # Calculate Category Weight in advance
-        cat_df['Cat_Weight'] = cat_df['Market_Value'] / cat_val if cat_val > 0 else 0
-
-        # Format columns for display
-        display_df = cat_df.copy()
-
-        # Select and Rename columns
-        display_df = display_df[[
-            'Ticker', 'Quantity', 'Avg_Cost', 'Current_Price',
-            'Net_Value', 'Unrealized_PL', 'ROI (%)', 'Cat_Weight', 'Status', 'Last_Update'
-        ]]
+        # Table preparation is cached on the category signature, so reruns
+        # with unchanged data reuse the rounded display frame. The category
+        # is part of the key because cat_df inherits df_all's version stamp.
+        display_df = _category_table(_df_signature(cat_df) + (category,), cat_df)
 
         # We need to ensure types are numeric for column_config to work
         # Ticker: Text
@@ -633,7 +1074,8 @@ def render_single_category_detail(df_all: pd.DataFrame, total_val: float, c_symb
                 "Ticker": st.column_config.TextColumn("代號", width="small", pinned=True),
                 "Quantity": st.column_config.NumberColumn("持倉", format="%.2f"),
                 "Avg_Cost": st.column_config.NumberColumn("成本", format="%.2f"),
-                "Current_Price": st.column_config.NumberColumn("現價", format="%.2f"),
+                "Display_Price": st.column_config.NumberColumn("現價", format="%.2f"),
+                "Display_Currency": st.column_config.TextColumn("幣別", width="small"),
                 "Net_Value": st.column_config.NumberColumn(
                     f"淨值 ({c_symbol})",
                     format=f"{c_symbol}%.0f"
@@ -664,24 +1106,103 @@ def render_single_category_detail(df_all: pd.DataFrame, total_val: float, c_symb
 
     # 右側：個股分析圖表
     with col_charts:
-        st.markdown(f"**📊 {category} 權重分佈**")
-        fig_pie = px.pie(cat_df, values='Market_Value', names='Ticker', hole=0.5)
-        fig_pie.update_layout(margin=dict(t=0, b=0, l=0, r=0), height=200, legend=dict(orientation="h", yanchor="bottom", y=-0.2))
-        st.plotly_chart(fig_pie, use_container_width=True)
-        
-        st.markdown(f"**📈 {category} 個股排行**")
-        df_sorted = cat_df.sort_values('ROI (%)', ascending=True)
-        fig_bar = px.bar(df_sorted, x='ROI (%)', y='Ticker', orientation='h', color='ROI (%)', color_continuous_scale='RdYlGn', text='ROI (%)')
-        fig_bar.update_layout(xaxis_title=None, yaxis_title=None, showlegend=False, height=250, margin=dict(t=0,b=0,l=0,r=0), coloraxis_showscale=False)
-        fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='inside')
-        st.plotly_chart(fig_bar, use_container_width=True)
+        # Cap traces so the browser-side payload stays bounded for large
+        # portfolios: top-N tickers plus an aggregated "Others" slice for
+        # the pie, and top/bottom-N by ROI for the bar.
+        max_items = config.ui.max_chart_items
+
+        pie_df = cat_df[['Ticker', 'Market_Value']]
+        if len(pie_df) > max_items:
+            top = pie_df.nlargest(max_items, 'Market_Value')
+            other_mv = pie_df['Market_Value'].sum() - top['Market_Value'].sum()
+            pie_df = pd.concat(
+                [top, pd.DataFrame([{'Ticker': '其他', 'Market_Value': other_mv}])],
+                ignore_index=True,
+            )
+
+        if len(cat_df) > max_items:
+            half = max(max_items // 2, 1)
+            df_sorted = pd.concat(
+                [cat_df.nsmallest(half, 'ROI (%)'), cat_df.nlargest(half, 'ROI (%)')]
+            ).drop_duplicates('Ticker').sort_values('ROI (%)', ascending=True)
+        else:
+            df_sorted = cat_df.sort_values('ROI (%)', ascending=True)
+
+        # One subplots figure for both charts: a single frontend react() call
+        fig = make_subplots(
+            rows=2, cols=1,
+            specs=[[{'type': 'domain'}], [{'type': 'xy'}]],
+            subplot_titles=(f"{category} 權重分佈", f"{category} 個股排行"),
+            vertical_spacing=0.12,
+        )
+        roi_vals = df_sorted['ROI (%)'].to_numpy(dtype=np.float32)
+        fig.add_trace(
+            go.Pie(labels=pie_df['Ticker'].to_numpy(), values=pie_df['Market_Value'].to_numpy(dtype=np.float32), hole=0.5, sort=False),
+            row=1, col=1,
+        )
+        fig.add_trace(
+            go.Bar(
+                x=roi_vals, y=df_sorted['Ticker'].to_numpy(), orientation='h',
+                marker=dict(color=roi_vals, colorscale='RdYlGn'),
+                text=roi_vals, texttemplate='%{text:.1f}%', textposition='inside',
+            ),
+            row=2, col=1,
+        )
+        fig.update_layout(
+            template='ainvest',
+            height=500,
+            margin=dict(t=30, b=0, l=0, r=0),
+            showlegend=False,
+        )
+        st.plotly_chart(fig, use_container_width=True, config=_PLOTLY_CONFIG)
+
+def _get_history_df(history: list) -> pd.DataFrame:
+    """
+    Return the parsed, date-sorted history frame, cached per session.
+
+    The chart renderers each need the same DataFrame(history) +
+    to_datetime + sort pipeline; keying the result on (row count, last
+    snapshot date and net-worth values) in session state means switching
+    between charts in the selector reuses one processed frame instead of
+    reparsing. The last record's values are part of the key because
+    save_snapshot overwrites today's record in place — same length and
+    date, new numbers.
+
+    Args:
+        history: List of snapshot dicts from session state
+
+    Returns:
+        pd.DataFrame: History sorted by parsed 'date' (empty if no rows)
+    """
+    if not history:
+        return pd.DataFrame()
+    last = history[-1]
+    key = (
+        len(history),
+        last.get('date'),
+        last.get('total_net_worth_twd'),
+        last.get('total_net_worth_usd'),
+    )
+    if st.session_state.get('_history_df_key') == key:
+        return st.session_state['_history_df']
+    df = pd.DataFrame(history)
+    df['date'] = pd.to_datetime(df['date'])
+    # Appended chronologically in the common case; only sort when needed
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date')
+    st.session_state['_history_df'] = df
+    st.session_state['_history_df_key'] = key
+    return df
+
 
 def render_history_chart(history: list, c_symbol: str):
     """Render Net Worth History chart."""
     if not history:
         return
         
-    df = pd.DataFrame(history)
+    import plotly.express as px
+
+    df = _get_history_df(history)
     if df.empty:
         return
         
@@ -691,13 +1212,13 @@ def render_history_chart(history: list, c_symbol: str):
     
     fig = px.line(df, x='date', y=y_col, title='總資產成長趨勢', markers=True)
     fig.update_layout(
+        template='ainvest',
         xaxis_title="日期",
         yaxis_title=f"總值 ({c_symbol})",
         height=300,
         margin=dict(l=20, r=20, t=40, b=20),
-        plot_bgcolor='rgba(0,0,0,0)',
     )
-    st.plotly_chart(fig, width="stretch")
+    st.plotly_chart(fig, width="stretch", config=_PLOTLY_CONFIG)
     
     # Stacked Area: Asset Classes
     cols = ["us_stock_val", "tw_stock_val", "cash_val", "crypto_val", "loan_val"]
@@ -706,75 +1227,87 @@ def render_history_chart(history: list, c_symbol: str):
     if cols:
         fig_area = px.area(df, x='date', y=cols, title='資產類別堆疊圖')
         fig_area.update_layout(
+            template='ainvest',
             xaxis_title="日期",
             yaxis_title="價值 (TWD)",
             height=300,
             margin=dict(l=20, r=20, t=40, b=20),
-            plot_bgcolor='rgba(0,0,0,0)',
         )
-        st.plotly_chart(fig_area, use_container_width=True)
+        st.plotly_chart(fig_area, use_container_width=True, config=_PLOTLY_CONFIG)
 
 
 # ===========================
 # Advanced Charts - Phase 1
 # ===========================
 
-def render_enhanced_networth_chart(history: list, c_symbol: str):
-    """Enhanced net worth growth chart with moving averages and targets."""
-    if not history or len(history) < 2:
-        st.info("需要至少 2 個歷史快照才能顯示增強版趨勢圖")
-        return
-    
-    df = pd.DataFrame(history)
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=16)
+def _build_networth_fig(hist_tuple: tuple, c_symbol: str) -> tuple:
+    """
+    Build the enhanced net-worth figure from an immutable history tuple.
+
+    Cached so selector-driven reruns reuse the finished figure instead of
+    redoing the DataFrame build, date parsing, sort and moving averages.
+
+    Args:
+        hist_tuple: Tuple of (date, value) pairs in display currency
+        c_symbol: Currency symbol for labels
+
+    Returns:
+        tuple: (go.Figure, sorted value array for the stats row)
+    """
+    df = pd.DataFrame(hist_tuple, columns=['date', 'value'])
     df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
-    
-    y_col = "total_net_worth_usd" if "$" in c_symbol and "NT" not in c_symbol else "total_net_worth_twd"
-    
-    # Calculate moving averages
-    if len(df) >= 7:
-        df['MA7'] = df[y_col].rolling(window=7, min_periods=1).mean()
-    if len(df) >= 30:
-        df['MA30'] = df[y_col].rolling(window=30, min_periods=1).mean()
-    
-    # Create figure with secondary y-axis for ROI
+    # Snapshots append chronologically, so the sort is almost always a
+    # no-op; a monotonicity scan is far cheaper than sorting to find out.
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date')
+
+    # Materialize the two arrays once; every trace, the moving averages,
+    # the target line and the returned stats all read from these instead
+    # of going back through Series indexing.
+    x = df['date'].to_numpy(dtype='datetime64[ms]')
+    y = df['value'].to_numpy(dtype='float64')
+
+    # Calculate moving averages on the raw array (O(n) cumsum form)
+    ma7 = _moving_average(y, 7) if len(y) >= 7 else None
+    ma30 = _moving_average(y, 30) if len(y) >= 30 else None
+
     fig = go.Figure()
-    
+
     # Main line - Net Worth
     fig.add_trace(go.Scatter(
-        x=df['date'],
-        y=df[y_col],
+        x=x,
+        y=y.astype(np.float32),
         mode='lines+markers',
         name='淨資產',
         line=dict(color='#5D69B1', width=3),
         marker=dict(size=6),
         hovertemplate='%{y:,.0f}<extra></extra>'
     ))
-    
+
     # Moving averages
-    if 'MA7' in df.columns:
+    if ma7 is not None:
         fig.add_trace(go.Scatter(
-            x=df['date'],
-            y=df['MA7'],
+            x=x,
+            y=ma7.astype(np.float32),
             mode='lines',
             name='7日均線',
             line=dict(color='#E58606', width=2, dash='dash'),
             hovertemplate='%{y:,.0f}<extra></extra>'
         ))
-    
-    if 'MA30' in df.columns:
+
+    if ma30 is not None:
         fig.add_trace(go.Scatter(
-            x=df['date'],
-            y=df['MA30'],
+            x=x,
+            y=ma30.astype(np.float32),
             mode='lines',
             name='30日均線',
             line=dict(color='#52BCA3', width=2, dash='dot'),
             hovertemplate='%{y:,.0f}<extra></extra>'
         ))
-    
+
     # Add target line (example: 1.5x current value)
-    current_val = df[y_col].iloc[-1]
-    target_val = current_val * 1.5
+    target_val = y[-1] * 1.5
     fig.add_hline(
         y=target_val,
         line_dash="dash",
@@ -782,7 +1315,7 @@ def render_enhanced_networth_chart(history: list, c_symbol: str):
         annotation_text=f"目標: {c_symbol}{target_val:,.0f}",
         annotation_position="right"
     )
-    
+
     fig.update_layout(
         title='📈 淨資產成長趨勢（增強版）',
         xaxis_title='日期',
@@ -798,19 +1331,33 @@ def render_enhanced_networth_chart(history: list, c_symbol: str):
             x=1
         )
     )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Stats summary
+    return fig, y
+
+
+def render_enhanced_networth_chart(history: list, c_symbol: str):
+    """Enhanced net worth growth chart with moving averages and targets."""
+    if not history or len(history) < 2:
+        st.info("需要至少 2 個歷史快照才能顯示增強版趨勢圖")
+        return
+
+    y_field = "total_net_worth_usd" if "$" in c_symbol and "NT" not in c_symbol else "total_net_worth_twd"
+
+    # Immutable (date, value) pairs hash quickly and key the figure cache.
+    hist_tuple = tuple((h.get('date'), h.get(y_field, 0)) for h in history)
+    fig, y = _build_networth_fig(hist_tuple, c_symbol)
+    st.plotly_chart(fig, use_container_width=True, config=_PLOTLY_CONFIG)
+
+    # Stats summary (cheap; kept outside the figure cache). Uses the sorted
+    # value array the builder already produced, so no second sort here.
     col1, col2, col3, col4 = st.columns(4)
-    total_return = ((df[y_col].iloc[-1] / df[y_col].iloc[0]) - 1) * 100 if df[y_col].iloc[0] > 0 else 0
-    peak_val = df[y_col].max()
-    current_drawdown = ((df[y_col].iloc[-1] / peak_val) - 1) * 100 if peak_val > 0 else 0
-    
+    total_return = ((y[-1] / y[0]) - 1) * 100 if y[0] > 0 else 0
+    peak_val = y.max()
+    current_drawdown = ((y[-1] / peak_val) - 1) * 100 if peak_val > 0 else 0
+
     col1.metric("總報酬", f"{total_return:+.2f}%")
     col2.metric("歷史高點", f"{c_symbol}{peak_val:,.0f}")
     col3.metric("當前回撤", f"{current_drawdown:.2f}%", delta=f"{current_drawdown:.2f}%")
-    col4.metric("數據點數", f"{len(df)} 個快照")
+    col4.metric("數據點數", f"{len(y)} 個快照")
 
 
 def render_allocation_radar_chart(df_all: pd.DataFrame, total_val: float):
@@ -819,18 +1366,32 @@ def render_allocation_radar_chart(df_all: pd.DataFrame, total_val: float):
         st.info("無資產數據")
         return
     
-    # Get current allocation
-    current_alloc = df_all.groupby('Type')['Market_Value'].sum()
+    # Get current allocation (reuse the shared aggregate when present)
+    current_alloc = df_all.attrs.get('type_mv')
+    if current_alloc is None:
+        current_alloc = type_value_sums(df_all)
     current_alloc_pct = (current_alloc / total_val * 100) if total_val > 0 else pd.Series()
     
-    # Get targets
-    targets = st.session_state.allocation_targets
-    
-    # Combine all categories
-    all_categories = list(set(list(targets.keys()) + list(current_alloc_pct.index)))
-    
-    target_values = [targets.get(cat, 0) for cat in all_categories]
-    actual_values = [current_alloc_pct.get(cat, 0) for cat in all_categories]
+    # Get targets in array form (cached alongside the session-state dict)
+    t_idx, t_vals = get_allocation_targets_np()
+
+    # One concat aligns both series over the category union in a single C
+    # pass, replacing the separate get_indexer and reindex steps
+    aligned = pd.concat([
+        pd.Series(t_vals, index=t_idx, name='target'),
+        current_alloc_pct.rename('actual'),
+    ], axis=1).fillna(0.0)
+
+    # Nothing to draw without targets or holdings; skip the figure build
+    if aligned.empty:
+        st.info("無配置目標或資產")
+        return
+
+    all_categories = aligned.index
+    t_aligned = aligned['target'].to_numpy()
+    a_aligned = aligned['actual'].to_numpy(dtype='float64')
+    target_values = t_aligned.astype(np.float32)
+    actual_values = a_aligned.astype(np.float32)
     
     # Create radar chart
     fig = go.Figure()
@@ -859,7 +1420,7 @@ def render_allocation_radar_chart(df_all: pd.DataFrame, total_val: float):
         polar=dict(
             radialaxis=dict(
                 visible=True,
-                range=[0, max(max(target_values + actual_values, default=0) * 1.2, 10)]
+                range=[0, max(float(aligned.to_numpy().max(initial=0.0)) * 1.2, 10)]
             )
         ),
         showlegend=True,
@@ -874,24 +1435,20 @@ def render_allocation_radar_chart(df_all: pd.DataFrame, total_val: float):
         )
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, config=_PLOTLY_CONFIG)
     
-    # Deviation summary
+    # Deviation summary, reusing the float64 arrays aligned above.
     st.markdown("#### 配置偏離度")
-    deviation_data = []
-    for cat in all_categories:
-        target = targets.get(cat, 0)
-        actual = current_alloc_pct.get(cat, 0)
-        deviation = actual - target
-        deviation_data.append({
-            "類別": cat,
-            "目標 %": f"{target:.1f}%",
-            "實際 %": f"{actual:.1f}%",
-            "偏離": f"{deviation:+.1f}%",
-            "狀態": "✅ 達標" if abs(deviation) <= 5 else ("🔵 不足" if deviation < 0 else "🟠 超配")
-        })
-    
-    df_deviation = pd.DataFrame(deviation_data)
+    d = a_aligned - t_aligned
+    status = np.select([np.abs(d) <= 5, d < 0], ['✅ 達標', '🔵 不足'], default='🟠 超配')
+
+    df_deviation = pd.DataFrame({
+        "類別": all_categories,
+        "目標 %": pd.Series(t_aligned).map("{:.1f}%".format).to_numpy(),
+        "實際 %": pd.Series(a_aligned).map("{:.1f}%".format).to_numpy(),
+        "偏離": pd.Series(d).map("{:+.1f}%".format).to_numpy(),
+        "狀態": status,
+    })
     st.dataframe(df_deviation, use_container_width=True, hide_index=True)
 
 
@@ -901,88 +1458,145 @@ def render_top10_holdings_dashboard(df_all: pd.DataFrame, c_symbol: str):
         st.info("無資產數據")
         return
     
-    # Filter and sort
-    df_top = df_all.nlargest(10, 'Market_Value').copy()
+    # Top 10 by market value via partial sort: argpartition is O(n) and
+    # only the ten survivors get fully ordered, instead of nlargest's
+    # generic sort path.
+    mv = df_all['Market_Value'].to_numpy()
+    if len(mv) <= 10:
+        idx = np.argsort(-mv, kind='stable')
+    else:
+        idx = np.argpartition(-mv, 10)[:10]
+        idx = idx[np.argsort(-mv[idx], kind='stable')]
+    df_top = df_all.iloc[idx].copy()
     
     st.markdown("### 🏆 Top 10 持倉績效儀表板")
-    
-    # Create cards in rows of 2
-    for i in range(0, len(df_top), 2):
-        cols = st.columns(2)
-        for j in range(2):
-            idx = i + j
-            if idx < len(df_top):
-                row = df_top.iloc[idx]
-                with cols[j]:
-                    # Determine colors
-                    roi = row.get('ROI (%)', 0)
-                    pl = row.get('Unrealized_PL', 0)
-                    roi_color = "green" if roi >= 0 else "red"
-                    pl_color = "green" if pl >= 0 else "red"
-                    
-                    # Rank badge
-                    rank = idx + 1
-                    badge_color = "#FFD700" if rank == 1 else ("#C0C0C0" if rank == 2 else ("#CD7F32" if rank == 3 else "#5D69B1"))
-                    
-                    st.markdown(f"""
-                    <div class="css-card" style="border: 2px solid {badge_color}; margin-bottom: 10px;">
-                        <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;'>
-                            <div>
-                                <span style='background-color: {badge_color}; color: white; padding: 4px 8px; border-radius: 5px; font-weight: bold; margin-right: 8px;'>#{rank}</span>
-                                <span style='font-size: 1.2em; font-weight: bold; color: #f1f5f9;'>{row.get('Ticker', 'N/A')}</span>
-                            </div>
-                            <div style='text-align: right;'>
-                                <div style='font-size: 0.85em; color: #94a3b8;'>{row.get('Type', 'N/A')}</div>
-                            </div>
-                        </div>
-                        <div style='margin: 10px 0;'>
-                            <div style='font-size: 1.4em; font-weight: bold; color: #818cf8;'>{c_symbol}{row.get('Market_Value', 0):,.0f}</div>
-                            <div style='font-size: 0.85em; color: #94a3b8;'>持倉: {row.get('Quantity', 0):.2f} | 成本: {row.get('Avg_Cost', 0):.2f}</div>
-                        </div>
-                        <div style='display: flex; justify-content: space-between; margin-top: 10px;'>
-                            <div>
-                                <div style='font-size: 0.8em; color: #94a3b8;'>損益</div>
-                                <div style='font-size: 1.1em; font-weight: bold; color: {pl_color};'>{c_symbol}{pl:,.0f}</div>
-                            </div>
-                            <div style='text-align: right;'>
-                                <div style='font-size: 0.8em; color: #94a3b8;'>ROI</div>
-                                <div style='font-size: 1.1em; font-weight: bold; color: {roi_color};'>{roi:+.2f}%</div>
-                            </div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+
+    # Plain dict records are far cheaper to field-access than Series rows,
+    # and each column ships all its cards in one markdown instead of one
+    # Streamlit round-trip per card.
+    records = df_top.to_dict('records')
+
+    # All colors picked in three vector ops up front; the card loop just
+    # indexes into the arrays.
+    roi_arr = df_top['ROI (%)'].to_numpy() if 'ROI (%)' in df_top.columns else np.zeros(len(df_top))
+    pl_arr = df_top['Unrealized_PL'].to_numpy() if 'Unrealized_PL' in df_top.columns else np.zeros(len(df_top))
+    roi_colors = np.where(roi_arr >= 0, 'green', 'red')
+    pl_colors = np.where(pl_arr >= 0, 'green', 'red')
+    ranks = np.arange(1, len(df_top) + 1)
+    badge_colors = np.select(
+        [ranks == 1, ranks == 2, ranks == 3],
+        ['#FFD700', '#C0C0C0', '#CD7F32'],
+        default='#5D69B1'
+    )
+
+    col_chunks = ([], [])
+    for idx, rec in enumerate(records):
+        col_chunks[idx % 2].append(_TOP_CARD_TPL.substitute(
+            badge_color=badge_colors[idx],
+            rank=ranks[idx],
+            ticker=rec.get('Ticker', 'N/A'),
+            asset_type=rec.get('Type', 'N/A'),
+            mv_str=f"{c_symbol}{rec.get('Market_Value', 0):,.0f}",
+            qty_str=f"{rec.get('Quantity', 0):.2f}",
+            cost_str=f"{rec.get('Avg_Cost', 0):.2f}",
+            pl_color=pl_colors[idx],
+            pl_str=f"{c_symbol}{pl_arr[idx]:,.0f}",
+            roi_color=roi_colors[idx],
+            roi_str=f"{roi_arr[idx]:+.2f}%",
+        ))
+
+    cols = st.columns(2)
+    for col, chunks in zip(cols, col_chunks):
+        with col:
+            st.markdown("".join(chunks), unsafe_allow_html=True)
     
     # Summary chart
     st.divider()
+    import plotly.express as px
     col_chart1, col_chart2 = st.columns(2)
     
+    # Hand plotly plain arrays instead of the frame so its validators skip
+    # the per-trace Series conversion; the rows are already ROI-sortable
+    # via one argsort on the extracted array.
+    tickers = df_top['Ticker'].to_numpy()
+
     with col_chart1:
         fig_pie = px.pie(
-            df_top,
-            values='Market_Value',
-            names='Ticker',
+            values=df_top['Market_Value'].to_numpy(dtype=np.float32),
+            names=tickers,
             title='Top 10 市值分佈',
             hole=0.4
         )
-        fig_pie.update_layout(height=300, margin=dict(t=40, b=0, l=0, r=0))
-        st.plotly_chart(fig_pie, use_container_width=True)
+        fig_pie.update_layout(template='ainvest', height=300)
+        st.plotly_chart(fig_pie, use_container_width=True, config=_PLOTLY_CONFIG)
     
     with col_chart2:
+        order = np.argsort(roi_arr, kind='stable')
         fig_bar = px.bar(
-            df_top.sort_values('ROI (%)', ascending=True),
-            x='ROI (%)',
-            y='Ticker',
+            x=roi_arr[order].astype(np.float32),
+            y=tickers[order],
             orientation='h',
             title='Top 10 報酬率排行',
-            color='ROI (%)',
-            color_continuous_scale='RdYlGn'
+            color=roi_arr[order],
+            color_continuous_scale='RdYlGn',
+            labels={'x': 'ROI (%)', 'y': 'Ticker'}
         )
         fig_bar.update_layout(
+            template='ainvest',
             height=300,
-            margin=dict(t=40, b=0, l=0, r=0),
             coloraxis_showscale=False
         )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        st.plotly_chart(fig_bar, use_container_width=True, config=_PLOTLY_CONFIG)
+
+
+def _monthly_aggregate(years: np.ndarray, months: np.ndarray, vals: np.ndarray) -> tuple:
+    """
+    Single-pass monthly aggregation over date-sorted snapshot arrays.
+
+    Replaces pct_change + groupby(['year','month']).agg with group-id
+    arithmetic: month boundaries come from one shifted comparison, the
+    per-month return sums from np.bincount, and the last value per month
+    from the boundary indices. Everything stays in numpy.
+
+    Args:
+        years: Year per snapshot, sorted by date
+        months: Month per snapshot, sorted by date
+        vals: Net-worth value per snapshot
+
+    Returns:
+        tuple: (year, month, summed return %, last value) arrays, one
+        entry per calendar month in chronological order
+    """
+    # Shape-generic: a (n, k) matrix aggregates k value series (e.g. the
+    # TWD and USD totals) against one boundary scan; 1D input stays 1D out.
+    vals2d = vals if vals.ndim == 2 else vals[:, None]
+    n = len(vals2d)
+    returns = np.zeros_like(vals2d, dtype='float64')
+    # pct_change: first row has no predecessor (NaN in pandas, which the
+    # groupby sum skips — zero contributes the same)
+    prev = vals2d[:-1]
+    returns[1:] = np.divide(vals2d[1:] - prev, prev,
+                            out=np.zeros_like(prev, dtype='float64'),
+                            where=prev != 0) * 100
+
+    ym = years.astype('int64') * 12 + months
+    starts = np.empty(n, dtype=bool)
+    starts[0] = True
+    np.not_equal(ym[1:], ym[:-1], out=starts[1:])
+    gid = np.cumsum(starts) - 1
+    n_groups = gid[-1] + 1
+
+    out_return = np.column_stack([
+        np.bincount(gid, weights=returns[:, j], minlength=n_groups)
+        for j in range(vals2d.shape[1])
+    ])
+    # A month's last snapshot sits right before the next month's first
+    last_idx = np.concatenate((np.flatnonzero(starts[1:]), [n - 1]))
+    out_last = vals2d[last_idx]
+    if vals.ndim == 1:
+        out_return = out_return[:, 0]
+        out_last = out_last[:, 0]
+    return years[starts], months[starts], out_return, out_last
 
 
 def render_monthly_returns_heatmap(history: list, c_symbol: str):
@@ -991,48 +1605,35 @@ def render_monthly_returns_heatmap(history: list, c_symbol: str):
         st.info("需要至少 2 個月的歷史數據才能顯示月度報酬熱力圖")
         return
     
-    df = pd.DataFrame(history)
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
+    df = _get_history_df(history)
     
     y_col = "total_net_worth_usd" if "$" in c_symbol and "NT" not in c_symbol else "total_net_worth_twd"
     
-    # Extract year and month
-    df['year'] = df['date'].dt.year
-    df['month'] = df['date'].dt.month
-    
-    # Calculate monthly returns
-    df['return'] = df[y_col].pct_change() * 100
-    
-    # Group by year and month, taking the last value of each month
-    monthly_data = df.groupby(['year', 'month']).agg({
-        'return': 'sum',  # Sum of returns within the month
-        y_col: 'last'
-    }).reset_index()
+    # Monthly returns and last-of-month values in one numpy pass over the
+    # sorted arrays instead of pct_change + a two-key groupby.
+    g_year, g_month, g_return, g_last = _monthly_aggregate(
+        df['date'].dt.year.to_numpy(),
+        df['date'].dt.month.to_numpy(),
+        df[y_col].to_numpy(dtype='float64'),
+    )
+    monthly_data = pd.DataFrame({
+        'year': g_year, 'month': g_month, 'return': g_return, y_col: g_last
+    })
     
-    # Pivot for heatmap
     if len(monthly_data) > 0:
-        pivot_data = monthly_data.pivot(index='year', columns='month', values='return')
-        
-        # Month names
-        month_names = ['1月', '2月', '3月', '4月', '5月', '6月', '7月', '8月', '9月', '10月', '11月', '12月']
-        pivot_data.columns = [month_names[m-1] for m in pivot_data.columns]
-        
+        # Heatmap matrix by direct indexing: a NaN-filled (years, 12) grid
+        # addressed with year/month positions replaces the pivot reshape.
+        uniq_years = np.unique(g_year)
+        z32 = np.full((uniq_years.size, 12), np.nan, dtype=np.float32)
+        z32[np.searchsorted(uniq_years, g_year), g_month - 1] = g_return
+
         # Create heatmap
         fig = go.Figure(data=go.Heatmap(
-            z=pivot_data.values,
-            x=pivot_data.columns,
-            y=pivot_data.index,
-            colorscale=[
-                [0, '#d32f2f'],      # Deep red for negative
-                [0.4, '#f44336'],    # Red
-                [0.48, '#ffebee'],   # Light red
-                [0.5, '#ffffff'],    # White for zero
-                [0.52, '#e8f5e9'],   # Light green
-                [0.6, '#4caf50'],    # Green
-                [1, '#1b5e20']       # Deep green for positive
-            ],
-            text=pivot_data.values,
+            z=z32,
+            x=_MONTH_NAMES,
+            y=uniq_years,
+            colorscale=_HEATMAP_COLORSCALE,
+            text=z32,
             texttemplate='%{text:.1f}%',
             textfont={"size": 10},
             colorbar=dict(title="報酬率 (%)"),
@@ -1047,7 +1648,7 @@ def render_monthly_returns_heatmap(history: list, c_symbol: str):
             template='plotly_white'
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, config=_PLOTLY_CONFIG)
         
         # Statistics
         col1, col2, col3, col4 = st.columns(4)
@@ -1072,16 +1673,9 @@ def render_advanced_charts_section(df_all: pd.DataFrame, total_val: float, c_sym
     st.caption("深入分析您的投資組合績效與配置")
     
     # Chart selector
-    chart_options = [
-        "🚀 淨資產成長趨勢（增強版）",
-        "🕸️ 資產配置雷達圖",
-        "🏆 Top 10 持倉績效",
-        "📊 月度報酬熱力圖"
-    ]
-    
     selected_chart = st.selectbox(
         "選擇要查看的圖表",
-        chart_options,
+        _CHART_OPTIONS,
         index=0,  # Default to enhanced net worth
         key="advanced_chart_selector"
     )
@@ -1091,11 +1685,11 @@ def render_advanced_charts_section(df_all: pd.DataFrame, total_val: float, c_sym
     # Render selected chart
     history = st.session_state.get("history_data", [])
     
-    if selected_chart == chart_options[0]:
+    if selected_chart == _CHART_OPTIONS[0]:
         render_enhanced_networth_chart(history, c_symbol)
-    elif selected_chart == chart_options[1]:
+    elif selected_chart == _CHART_OPTIONS[1]:
         render_allocation_radar_chart(df_all, total_val)
-    elif selected_chart == chart_options[2]:
+    elif selected_chart == _CHART_OPTIONS[2]:
         render_top10_holdings_dashboard(df_all, c_symbol)
-    elif selected_chart == chart_options[3]:
+    elif selected_chart == _CHART_OPTIONS[3]:
         render_monthly_returns_heatmap(history, c_symbol)
\ No newline at end of file
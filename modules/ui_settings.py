@@ -27,6 +27,7 @@ def render_account_manager():
     # List existing accounts
     if accounts:
         st.markdown("### 現有帳戶")
+        account_types = config.ui.account_types  # hoisted out of the per-account loop
         for i, acc in enumerate(accounts):
             # Get account_type with backward compatibility
             acc_type = acc.get('account_type') or acc.get('type', '其他')
@@ -36,12 +37,12 @@ def render_account_manager():
                 # Get current type with backward compatibility
                 current_type = acc.get('account_type') or acc.get('type', '其他')
                 try:
-                    type_idx = config.ui.account_types.index(current_type)
+                    type_idx = account_types.index(current_type)
                 except ValueError:
                     type_idx = 0
                 new_type = c2.selectbox(
                     "帳戶類型", 
-                    config.ui.account_types, 
+                    account_types, 
                     index=type_idx, 
                     key=f"acc_type_{i}"
                 )
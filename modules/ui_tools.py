@@ -8,12 +8,14 @@ This module provides utility tools including:
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime
 from modules.data_loader import save_all_data
 from modules.risk_management import suggest_sl_tp_for_holding, calculate_atr, suggest_sl_tp_for_entry
-from modules.market_service import fetch_historical_data
+from modules.market_service import fetch_historical_data, type_value_sums
+from modules.state_manager import get_allocation_targets_np
 from modules.logger import get_logger
 from config import get_config
 
@@ -27,38 +29,26 @@ logger = get_logger(__name__)
 
 def calculate_base_suggestions(df_market_data, total_val, new_fund):
     """計算系統建議的原始分配"""
-    if not df_market_data.empty:
-        current_alloc = df_market_data.groupby("Type")["Market_Value"].sum()
-    else:
-        current_alloc = pd.Series(dtype=float)
+    current_alloc = type_value_sums(df_market_data)
 
-    targets = st.session_state.allocation_targets
-    all_types = list(targets.keys())
+    t_idx, t_vals = get_allocation_targets_np()
+    all_types = t_idx.tolist()
 
     final_total_val = total_val + new_fund
-    suggestions = []
-
-    for cat in all_types:
-        target_pct =targets.get(cat, 0.0) / 100.0
-        current_val = current_alloc.get(cat, 0.0)
-        ideal_val = final_total_val * target_pct
-        gap = ideal_val - current_val
-        suggestions.append({"Type": cat, "Gap": gap if gap > 0 else 0})
 
-    df_sug = pd.DataFrame(suggestions)
-    total_gap = df_sug["Gap"].sum()
+    # Vectorized: gaps, scaling and leftover spread are plain array
+    # arithmetic instead of two row-wise applies.
+    target_arr = t_vals / 100.0
+    current_vals = current_alloc.reindex(t_idx, fill_value=0.0).to_numpy()
+    gap_arr = np.maximum(final_total_val * target_arr - current_vals, 0.0)
+    total_gap = gap_arr.sum()
 
     if total_gap > new_fund and total_gap > 0:
-        df_sug["Suggested"] = df_sug.apply(
-            lambda x: (x["Gap"] / total_gap * new_fund), axis=1
-        )
+        suggested = gap_arr / total_gap * new_fund
     else:
-        remaining = new_fund - total_gap
-        df_sug["Suggested"] = df_sug.apply(
-            lambda x: x["Gap"] + (remaining * (targets.get(x["Type"], 0) / 100)), axis=1
-        )
+        suggested = gap_arr + (new_fund - total_gap) * target_arr
 
-    return df_sug.set_index("Type")["Suggested"].to_dict()
+    return dict(zip(all_types, suggested.tolist()))
 
 
 def render_fund_calculator(df_market_data, c_symbol, total_val):
@@ -137,12 +127,7 @@ def render_fund_calculator(df_market_data, c_symbol, total_val):
             st.plotly_chart(fig1, use_container_width=True)
 
             # Expected total
-            if not df_market_data.empty:
-                cur_vals = (
-                    df_market_data.groupby("Type")["Market_Value"].sum().to_dict()
-                )
-            else:
-                cur_vals = {}
+            cur_vals = type_value_sums(df_market_data).to_dict()
             final_vals = {
                 cat: cur_vals.get(cat, 0) + current_plan.get(cat, 0)
                 for cat in set(list(cur_vals.keys()) + labels)